@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tesseract Backend Benchmark
+
+Compares the current Pytesseract backend (a new tesseract process and temp
+files for every image) with the persistent engine pool (tesserocr, engines
+loaded once, images passed in memory) on the same images.
+
+Usage:
+    python scripts/benchmark_tesseract.py
+    python scripts/benchmark_tesseract.py --images images --repeat 10 --threads 1 4 8
+    python scripts/benchmark_tesseract.py --json results/tesseract_benchmark.json
+
+Author: OCR Project
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from process_images import OCRProcessor
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+
+
+def parse_args():
+    """Parse command line options."""
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Benchmark pytesseract against the Tesseract engine pool")
+    parser.add_argument('--images', type=Path, default=project_root / "images", help="Folder of test images")
+    parser.add_argument('--repeat', type=int, default=5, help="Times each image is processed per run")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help="Concurrent calls to test")
+    parser.add_argument('--json', type=Path, help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def run(extract, image_paths, threads):
+    """
+    Process every image with `threads` concurrent calls.
+
+    Returns:
+        tuple: (results dict, texts in input order)
+    """
+    def timed(image_path):
+        start = time.perf_counter()
+        text = extract(image_path)
+        return text, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outputs = list(pool.map(timed, image_paths))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([latency for _, latency in outputs]) * 1000
+    return {
+        'threads': threads,
+        'images': len(image_paths),
+        'images_per_second': len(image_paths) / wall,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }, [text for text, _ in outputs]
+
+
+def main():
+    """Run both backends on the same images and print a comparison."""
+    args = parse_args()
+
+    images = sorted(p for p in args.images.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not images:
+        print(f"❌ No images found in {args.images}")
+        return
+    image_paths = images * args.repeat
+
+    processor = OCRProcessor()
+    if not processor.configure_tesseract():
+        return
+    if not processor.initialize_tesseract_engines(size=max(args.threads)):
+        return
+
+    backends = {
+        'pytesseract': processor.extract_text_pytesseract,
+        'engine_pool': processor.extract_text_tesserocr,
+    }
+
+    print(f"\n📊 {len(images)} images x {args.repeat} repeats\n")
+    results, texts = [], {}
+    for name, extract in backends.items():
+        extract(images[0])  # Warm up (engine start, page cache)
+        for threads in args.threads:
+            result, texts[name] = run(extract, image_paths, threads)
+            results.append({'backend': name, **result})
+
+    same = sum(a == b for a, b in zip(texts['pytesseract'], texts['engine_pool']))
+
+    print(f"{'backend':<14}{'threads':>8}{'images/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    print("-" * 50)
+    for r in results:
+        print(f"{r['backend']:<14}{r['threads']:>8}{r['images_per_second']:>10.2f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+    print(f"\n✅ Identical text for {same}/{len(image_paths)} images")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({
+                'tesseract': processor.tesseract_engines.version,
+                'identical_text': same / len(image_paths),
+                'results': results,
+            }, f, indent=2)
+        print(f"📁 Results saved to: {args.json}")
+
+    processor.tesseract_engines.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,17 @@ Date: July 2025
 
 import os
 import sys
+import argparse
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, wait
+from functools import partial
 from pathlib import Path
 import pandas as pd
+import numpy as np
 import time
 from tqdm import tqdm
 
@@ -29,15 +38,246 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 
+# Per-process OCRProcessor used by pool workers; set up once by _init_worker
+_worker_processor = None
+
+
+def _init_worker(project_root, tesseract_cmd, torch_threads, options, use_easyocr=None):
+    """
+    Pool initializer: build one OCRProcessor per worker process.
+
+    The EasyOCR reader (and its models) is loaded here once, not per image.
+
+    Args:
+        project_root (Path): Project root passed to OCRProcessor
+        tesseract_cmd (str): Tesseract executable found by the parent process
+        torch_threads (int): Threads each worker's EasyOCR may use
+        options (dict): Other OCRProcessor keyword arguments (timeouts, ...)
+        use_easyocr (bool): Whether the run's fingerprint includes EasyOCR;
+            None (no fingerprint) uses it if it can be loaded
+    """
+    global _worker_processor
+
+    # Keep the workers from oversubscribing the CPU: one core share each
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _worker_processor = OCRProcessor(project_root, **options)
+    if _worker_processor.tesseract_backend == 'tesserocr' and not _worker_processor.initialize_tesseract_engines():
+        # Don't fall back to the tesseract CLI: the run (and its manifest
+        # fingerprint) is set up for the engine pool
+        raise RuntimeError("Tesseract engine pool unavailable in worker process")
+    if use_easyocr is not False and not _worker_processor.initialize_easyocr() and use_easyocr:
+        raise RuntimeError("EasyOCR reader unavailable in worker process")
+
+
+def _process_in_worker(rows, easyocr_batch_size):
+    """
+    Run process_batch on a chunk of rows in a pool worker.
+
+    Returns:
+        list: (image_id, image_name, success, error message or None) per row
+    """
+    return _worker_processor.process_batch(rows, easyocr_batch_size)
+
+
+def _is_engine_error(text):
+    """
+    True for the placeholder texts the extract_text_* methods return when an
+    engine failed on the image. A missing EasyOCR reader is not one: it is
+    part of the settings fingerprint instead (see ocr_fingerprint).
+    """
+    return text is not None and text.startswith("Error processing image with")
+
+
+class OCRManifest:
+    """
+    SQLite record of processed images, used by incremental runs.
+    
+    Each entry stores the image's size, mtime and SHA-256 hash together with a
+    fingerprint of the OCR engine versions and settings. An image is skipped
+    while its content and the fingerprint are unchanged and its result file
+    still exists. Entries are written as images finish, so a run that is
+    interrupted resumes where it stopped.
+    """
+    
+    COMMIT_EVERY = 100
+    
+    def __init__(self, manifest_path):
+        """
+        Open (or create) the manifest.
+        
+        Args:
+            manifest_path (Path): SQLite file holding the manifest
+        """
+        Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(manifest_path))
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS processed (
+            image_key TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            content_hash TEXT,
+            fingerprint TEXT,
+            output_file TEXT,
+            processed_at REAL
+        )""")
+        self.conn.commit()
+        self._uncommitted = 0
+    
+    @staticmethod
+    def file_hash(image_path):
+        """SHA-256 of a file, read in 1 MB blocks."""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def check(self, image_key, image_path, fingerprint, output_path):
+        """
+        Decide whether an image needs OCR.
+        
+        The hash is only computed when size or mtime changed, so unchanged
+        images cost one stat call.
+        
+        Args:
+            image_key (str): Unique key of the dataset row
+            image_path (Path): Image file
+            fingerprint (str): Current engine versions and settings
+            output_path (Path): Result file the image is written to
+        
+        Returns:
+            tuple or None: None if the image can be skipped, otherwise
+            (size, mtime_ns, content_hash) to record once it is processed
+        """
+        stat = image_path.stat()
+        row = self.conn.execute("SELECT size, mtime_ns, content_hash, fingerprint FROM processed "
+                                "WHERE image_key = ?", (image_key,)).fetchone()
+        current = row is not None and row[3] == fingerprint and output_path.exists()
+        if current and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return None
+        
+        record = (stat.st_size, stat.st_mtime_ns, self.file_hash(image_path))
+        if current and row[2] == record[2]:
+            self.record(image_key, record, fingerprint, output_path)  # Touched, not changed
+            return None
+        return record
+    
+    def record(self, image_key, record, fingerprint, output_path):
+        """Mark an image as processed with the content it had when checked."""
+        self.conn.execute("INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                          (image_key, *record, fingerprint, str(output_path), time.time()))
+        self._uncommitted += 1
+        if self._uncommitted >= self.COMMIT_EVERY:
+            self.commit()
+    
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+    
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class TesseractEnginePool:
+    """
+    Long-lived Tesseract engines shared between threads (tesserocr binding).
+    
+    Each engine loads the language data once and is reused for every image, and
+    images are handed over in memory, so there is no tesseract process start or
+    temp file per image. An engine reads one image at a time; up to `size`
+    engines are created as concurrent calls need them. tesserocr releases the
+    GIL while recognizing, so engines on different threads run in parallel.
+    """
+    
+    def __init__(self, size=None, lang='eng', tessdata_path=None):
+        """
+        Create the pool; engines are started on first use.
+        
+        Args:
+            size (int): Maximum number of engines (default: CPU count)
+            lang (str): Tesseract language(s), as for pytesseract
+            tessdata_path (str): tessdata directory if not the default
+        """
+        import tesserocr  # Optional dependency: pip install tesserocr
+        
+        self._tesserocr = tesserocr
+        self.size = size or os.cpu_count() or 1
+        self.lang = lang
+        self.tessdata_path = tessdata_path
+        self.version = tesserocr.tesseract_version().splitlines()[0]
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _acquire(self):
+        with self._lock:
+            create = self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        try:
+            kwargs = {'lang': self.lang}
+            if self.tessdata_path:
+                kwargs['path'] = self.tessdata_path
+            return self._tesserocr.PyTessBaseAPI(**kwargs)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+    
+    def image_to_string(self, image, timeout=None):
+        """
+        Recognize text in a PIL image, like pytesseract.image_to_string.
+        
+        Args:
+            image (PIL.Image.Image): Image already in memory
+            timeout (float): Seconds before recognition is cancelled
+        
+        Returns:
+            str: Extracted text
+        """
+        engine = self._acquire()
+        try:
+            engine.SetImage(image)
+            if not engine.Recognize(int((timeout or 0) * 1000)):
+                raise RuntimeError("recognition failed or timed out")
+            return engine.GetUTF8Text()
+        finally:
+            engine.Clear()
+            self._idle.put(engine)
+    
+    def close(self):
+        """Shut down the idle engines."""
+        while not self._idle.empty():
+            self._idle.get().End()
+
+
 class OCRProcessor:
     """Main class for batch OCR processing."""
     
-    def __init__(self, project_root=None):
+    IN_FLIGHT_PER_WORKER = 3  # Chunks queued per worker process in parallel mode
+    
+    def __init__(self, project_root=None, tesseract_timeout=None, easyocr_timeout=None, tesseract_backend='cli',
+                 tesseract_threads=None):
         """
         Initialize the OCR processor.
         
         Args:
             project_root (Path): Path to project root directory
+            tesseract_timeout (float): Seconds before a Tesseract run is killed
+                (None = no limit)
+            easyocr_timeout (float): Seconds to wait for EasyOCR on one image
+                (None = no limit); batched calls get this per image
+            tesseract_backend (str): 'cli' runs the tesseract executable per
+                image through pytesseract; 'tesserocr' keeps a pool of
+                in-process engines (see TesseractEnginePool)
+            tesseract_threads (int): Images Tesseract may work on at once
+                (default: CPU count; a worker process gets its CPU share)
         """
         if project_root is None:
             self.project_root = Path(__file__).parent.parent
@@ -54,12 +294,29 @@ class OCRProcessor:
         
         # Initialize OCR readers
         self.easy_reader = None
+        self.tesseract_backend = tesseract_backend
+        self.tesseract_engines = None
+        
+        # Per-engine timeouts; the engines of one image run concurrently
+        self.tesseract_timeout = tesseract_timeout
+        self.easyocr_timeout = easyocr_timeout
+        self.tesseract_threads = tesseract_threads or os.cpu_count() or 1
+        self._tesseract_pool = None
+        self._easyocr_pool = None
+        self._easyocr_stuck = None  # EasyOCR call still running after it timed out
+        
+        # Incremental runs (see OCRManifest)
+        self.last_engine_error = None
+        self._manifest = None
+        self._fingerprint = None
+        self._pending_records = {}
         
         # Statistics
         self.stats = {
             'total_images': 0,
             'processed_successfully': 0,
             'failed_processing': 0,
+            'skipped_unchanged': 0,
             'start_time': None,
             'end_time': None
         }
@@ -107,12 +364,60 @@ class OCRProcessor:
             print(f"❌ Failed to initialize EasyOCR: {str(e)}")
             return False
     
-    def extract_text_pytesseract(self, image_path):
+    def initialize_tesseract_engines(self, size=None):
+        """
+        Set up the persistent Tesseract engine pool used by the 'tesserocr' backend.
+        
+        Args:
+            size (int): Maximum number of engines (default: tesseract_threads)
+        
+        Returns:
+            bool: True if the tesserocr binding works
+        """
+        try:
+            self.tesseract_engines = TesseractEnginePool(size or self.tesseract_threads)
+            print(f"✅ Tesseract engine pool ready ({self.tesseract_engines.version})")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to set up Tesseract engine pool: {str(e)}")
+            print("   Install the binding with: pip install tesserocr")
+            return False
+    
+    def extract_text_tesseract(self, image_path, timeout=None):
+        """Extract text with the configured Tesseract backend."""
+        if self.tesseract_engines is not None:
+            return self.extract_text_tesserocr(image_path, timeout)
+        return self.extract_text_pytesseract(image_path, timeout)
+    
+    def extract_text_tesserocr(self, image_path, timeout=None):
+        """
+        Extract text from image using the persistent Tesseract engine pool.
+        
+        Args:
+            image_path (Path): Path to the image file
+            timeout (float): Seconds before recognition is cancelled
+        
+        Returns:
+            str: Extracted text
+        """
+        try:
+            with Image.open(image_path) as image:
+                if image.mode not in ('1', 'L', 'RGB', 'RGBA'):
+                    image = image.convert('RGB')
+                text = self.tesseract_engines.image_to_string(image, timeout)
+            
+            return text.strip()
+        
+        except Exception as e:
+            return f"Error processing image with Tesseract engine pool: {str(e)}"
+    
+    def extract_text_pytesseract(self, image_path, timeout=None):
         """
         Extract text from image using Pytesseract.
         
         Args:
             image_path (Path): Path to the image file
+            timeout (float): Seconds before the tesseract process is killed
         
         Returns:
             str: Extracted text
@@ -123,7 +428,7 @@ class OCRProcessor:
             
             # Extract text using Pytesseract
             # You can customize OCR settings here
-            text = pytesseract.image_to_string(image, lang='eng')
+            text = pytesseract.image_to_string(image, lang='eng', timeout=timeout or 0)
             
             return text.strip()
         
@@ -155,6 +460,130 @@ class OCRProcessor:
         except Exception as e:
             return f"Error processing image with EasyOCR: {str(e)}"
     
+    def _engine_pools(self):
+        """Thread pools that run Tesseract and EasyOCR alongside each other."""
+        if self._tesseract_pool is None:
+            # Each thread drives one tesseract process (or pool engine)
+            self._tesseract_pool = ThreadPoolExecutor(max_workers=self.tesseract_threads,
+                                                      thread_name_prefix='tesseract')
+            self._easyocr_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='easyocr')
+        return self._tesseract_pool, self._easyocr_pool
+    
+    def _submit_pytesseract(self, image_path):
+        tesseract_pool, _ = self._engine_pools()
+        return tesseract_pool.submit(self.extract_text_tesseract, image_path, self.tesseract_timeout)
+    
+    def _run_easyocr(self, fn, *args, images=1):
+        """
+        Call fn on the EasyOCR thread, waiting at most easyocr_timeout per image.
+        
+        EasyOCR calls run one at a time, and a call that timed out cannot be
+        interrupted. Until it finishes, later calls fail straight away instead
+        of queueing behind it, so no image's timeout expires before it starts.
+        
+        Raises:
+            TimeoutError: The call timed out, or the reader is still busy
+        """
+        if self._easyocr_stuck is not None and not self._easyocr_stuck.done():
+            raise TimeoutError("skipped, reader still busy with an image that timed out")
+        _, easyocr_pool = self._engine_pools()
+        future = easyocr_pool.submit(fn, *args)
+        timeout = self.easyocr_timeout * images if self.easyocr_timeout else None
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            self._easyocr_stuck = future
+            raise TimeoutError(f"timed out after {timeout:g} seconds")
+    
+    def extract_text_easyocr_bounded(self, image_path):
+        """extract_text_easyocr under easyocr_timeout."""
+        try:
+            return self._run_easyocr(self.extract_text_easyocr, image_path)
+        except TimeoutError as e:
+            return f"Error processing image with EasyOCR: {str(e)}"
+    
+    def extract_text_both(self, image_path):
+        """
+        Run Pytesseract and EasyOCR on one image at the same time.
+        
+        Tesseract runs as an external process while EasyOCR runs in this
+        process, so the image takes about as long as the slower engine rather
+        than the sum of both. Each engine is bounded by its own timeout.
+        
+        Args:
+            image_path (Path): Path to the image file
+        
+        Returns:
+            tuple: (pytesseract_text, easyocr_text)
+        """
+        tesseract_future = self._submit_pytesseract(image_path)
+        easyocr_text = self.extract_text_easyocr_bounded(image_path)
+        return tesseract_future.result(), easyocr_text
+    
+    def _load_for_batch(self, image_path, max_side):
+        """Read an image as RGB (the order EasyOCR uses for paths), scaled to fit max_side."""
+        image = cv2.imread(str(image_path))
+        if image is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        scale = max_side / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return image
+    
+    def extract_text_easyocr_batch(self, image_paths, max_side=1280, recognizer_batch_size=32):
+        """
+        Extract text from several images with batched EasyOCR calls.
+        
+        Images are scaled to at most max_side pixels, grouped into landscape and
+        portrait, and padded at the bottom/right (with their median colour) to the
+        largest size in their group. Each group then goes through detection and
+        recognition in a single readtext_batched call, bounded by easyocr_timeout
+        per image in the group.
+        
+        Args:
+            image_paths (list): Paths of the image files
+            max_side (int): Longest side images are scaled down to
+            recognizer_batch_size (int): Text crops recognized per forward pass
+        
+        Returns:
+            list: Extracted text per image, in input order
+        """
+        if self.easy_reader is None:
+            return ["EasyOCR reader not initialized"] * len(image_paths)
+        
+        texts = [None] * len(image_paths)
+        groups = {'landscape': [], 'portrait': []}
+        for i, image_path in enumerate(image_paths):
+            try:
+                image = self._load_for_batch(image_path, max_side)
+                groups['landscape' if image.shape[1] >= image.shape[0] else 'portrait'].append((i, image))
+            except Exception as e:
+                texts[i] = f"Error processing image with EasyOCR: {str(e)}"
+        
+        for group in groups.values():
+            if not group:
+                continue
+            height = max(image.shape[0] for _, image in group)
+            width = max(image.shape[1] for _, image in group)
+            batch = []
+            for _, image in group:
+                fill = np.median(image.reshape(-1, 3), axis=0).tolist()
+                batch.append(cv2.copyMakeBorder(image, 0, height - image.shape[0], 0, width - image.shape[1],
+                                                cv2.BORDER_CONSTANT, value=fill))
+            try:
+                results = self._run_easyocr(partial(self.easy_reader.readtext_batched, batch,
+                                                    batch_size=recognizer_batch_size), images=len(batch))
+            except Exception as e:
+                for i, _ in group:
+                    texts[i] = f"Error processing image with EasyOCR: {str(e)}"
+                continue
+            # Split the batch back into per-image text, as extract_text_easyocr joins it
+            for (i, _), result in zip(group, results):
+                texts[i] = ' '.join([r[1] for r in result]).strip()
+        
+        return texts
+    
     def preprocess_image(self, image_path):
         """
         Basic image preprocessing to improve OCR accuracy.
@@ -187,6 +616,34 @@ class OCRProcessor:
             print(f"Error preprocessing image {image_path}: {str(e)}")
             return None
     
+    def output_path_for(self, image_id, image_name):
+        """Result file of one dataset row."""
+        base_name = Path(image_name).stem  # Remove file extension
+        return self.results_folder / f"{image_id}_{base_name}_extracted.txt"
+    
+    def ocr_fingerprint(self, easyocr_batch_size=1):
+        """
+        Engines, versions and settings that shape the extracted text, as a JSON string.
+        
+        Images processed without EasyOCR (reader unavailable) are recorded as
+        such, so they are redone only once EasyOCR works again.
+        """
+        if self.tesseract_engines is not None:
+            tesseract_version = self.tesseract_engines.version
+        else:
+            tesseract_version = str(pytesseract.get_tesseract_version())
+        settings = {
+            'engines': ['tesseract'],
+            'tesseract': tesseract_version,
+            'tesseract_backend': self.tesseract_backend,
+            'tesseract_lang': 'eng',
+        }
+        if self.easy_reader is not None:
+            settings['engines'].append('easyocr')
+            settings.update(easyocr=easyocr.__version__, easyocr_langs=['en'],
+                            easyocr_batch_size=easyocr_batch_size)
+        return json.dumps(settings, sort_keys=True)
+    
     def save_extracted_text(self, image_id, image_name, pytesseract_text, easyocr_text):
         """
         Save extracted text to a file.
@@ -198,9 +655,8 @@ class OCRProcessor:
             easyocr_text (str): Text extracted by EasyOCR
         """
         # Create filename for the text file
-        base_name = Path(image_name).stem  # Remove file extension
-        output_filename = f"{image_id}_{base_name}_extracted.txt"
-        output_path = self.results_folder / output_filename
+        output_path = self.output_path_for(image_id, image_name)
+        output_filename = output_path.name
         
         # Prepare content
         content = f"""OCR EXTRACTION RESULTS
@@ -227,27 +683,34 @@ PROCESSING NOTES:
 END OF EXTRACTION
 =================="""
         
-        # Save to file
+        # Save to file; written under a temporary name first so an interrupted
+        # run never leaves a truncated result behind
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
+            tmp_path = output_path.with_name(output_filename + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            os.replace(tmp_path, output_path)
             return True
         except Exception as e:
             print(f"❌ Error saving {output_filename}: {str(e)}")
             return False
     
-    def process_single_image(self, image_id, image_name):
+    def process_single_image(self, image_id, image_name, easyocr_text=None, pytesseract_text=None):
         """
         Process a single image and extract text.
         
         Args:
             image_id (int): Image ID from CSV
             image_name (str): Image filename
+            easyocr_text (str): EasyOCR result computed in a batch beforehand;
+                EasyOCR runs on the image itself if not given
+            pytesseract_text (str): Pytesseract result computed beforehand
         
         Returns:
             bool: True if successful, False otherwise
         """
         image_path = self.images_folder / image_name
+        self.last_engine_error = None
         
         # Check if image exists
         if not image_path.exists():
@@ -255,9 +718,17 @@ END OF EXTRACTION
             return False
         
         try:
-            # Extract text using both methods
-            pytesseract_text = self.extract_text_pytesseract(image_path)
-            easyocr_text = self.extract_text_easyocr(image_path)
+            # Extract text using both methods, concurrently where both are needed
+            if easyocr_text is None and pytesseract_text is None:
+                pytesseract_text, easyocr_text = self.extract_text_both(image_path)
+            elif easyocr_text is None:
+                easyocr_text = self.extract_text_easyocr_bounded(image_path)
+            elif pytesseract_text is None:
+                pytesseract_text = self.extract_text_tesseract(image_path, self.tesseract_timeout)
+            
+            for text in (pytesseract_text, easyocr_text):
+                if _is_engine_error(text):
+                    self.last_engine_error = text
             
             # Save results to file
             success = self.save_extracted_text(image_id, image_name, pytesseract_text, easyocr_text)
@@ -271,6 +742,41 @@ END OF EXTRACTION
             print(f"❌ Error processing {image_name}: {str(e)}")
             return False
     
+    def process_batch(self, rows, easyocr_batch_size=1):
+        """
+        Process several images, running EasyOCR over them in batches.
+        
+        Args:
+            rows (list): (image_id, image_name) pairs
+            easyocr_batch_size (int): Images per EasyOCR call (1 = one by one)
+        
+        Returns:
+            list: (image_id, image_name, success, error message or None) per
+            row; a saved image whose OCR engine failed has success True and
+            the engine's error message
+        """
+        easyocr_texts, tesseract_futures = {}, {}
+        if easyocr_batch_size > 1 and self.easy_reader is not None:
+            found = [row for row in rows if (self.images_folder / row[1]).exists()]
+            # Tesseract works through the chunk while EasyOCR runs the batch
+            for row in found:
+                tesseract_futures[row] = self._submit_pytesseract(self.images_folder / row[1])
+            for start in range(0, len(found), easyocr_batch_size):
+                chunk = found[start:start + easyocr_batch_size]
+                texts = self.extract_text_easyocr_batch([self.images_folder / name for _, name in chunk])
+                easyocr_texts.update(zip(chunk, texts))
+        
+        results = []
+        for image_id, image_name in rows:
+            try:
+                row = (image_id, image_name)
+                pytesseract_text = tesseract_futures[row].result() if row in tesseract_futures else None
+                success = self.process_single_image(image_id, image_name, easyocr_texts.get(row), pytesseract_text)
+                results.append((image_id, image_name, success, self.last_engine_error))
+            except Exception as e:
+                results.append((image_id, image_name, False, str(e)))
+        return results
+    
     def load_dataset(self):
         """
         Load the image dataset from CSV.
@@ -294,9 +800,18 @@ END OF EXTRACTION
             print(f"❌ Error loading CSV: {str(e)}")
             return None
     
-    def run_batch_processing(self):
+    def run_batch_processing(self, workers=1, easyocr_batch_size=1, incremental=False, manifest_path=None):
         """
         Run batch processing on all images in the dataset.
+        
+        Args:
+            workers (int): Worker processes to spread images over. With 1,
+                images are processed in this process.
+            easyocr_batch_size (int): Images per batched EasyOCR call (1 = one by one)
+            incremental (bool): Skip images whose content, engines and settings
+                are unchanged since they were last processed
+            manifest_path (Path): Manifest used by incremental runs
+                (default: results/ocr_manifest.sqlite)
         """
         print("🚀 Starting OCR Batch Processing")
         print("=" * 50)
@@ -305,13 +820,22 @@ END OF EXTRACTION
         self.stats['start_time'] = time.time()
         
         # Configure Tesseract
-        if not self.configure_tesseract():
+        if self.tesseract_backend == 'tesserocr':
+            # Engines start lazily, so this only checks that the binding works
+            if not self.initialize_tesseract_engines():
+                print("❌ Cannot proceed without Tesseract. Exiting.")
+                return
+        elif not self.configure_tesseract():
             print("❌ Cannot proceed without Tesseract. Exiting.")
             return
         
-        # Initialize EasyOCR
-        if not self.initialize_easyocr():
-            print("⚠️  Proceeding without EasyOCR (only Pytesseract will be used)")
+        # Initialize EasyOCR. In parallel mode each worker loads its own reader;
+        # incremental runs load one here too, as the fingerprint depends on it
+        use_easyocr = None
+        if workers == 1 or incremental:
+            if not self.initialize_easyocr():
+                print("⚠️  Proceeding without EasyOCR (only Pytesseract will be used)")
+            use_easyocr = self.easy_reader is not None
         
         # Load dataset
         df = self.load_dataset()
@@ -326,21 +850,32 @@ END OF EXTRACTION
         print(f"Images to process: {len(df)}")
         print(f"Images folder: {self.images_folder}")
         print(f"Results folder: {self.results_folder}")
+        print(f"Worker processes: {workers}")
+        print(f"EasyOCR batch size: {easyocr_batch_size}")
         print(f"\\nStarting processing...\\n")
         
-        # Process each image with progress bar
-        for index, row in tqdm(df.iterrows(), total=len(df), desc="Processing images"):
-            image_id = row['id']
-            image_name = row['imagename']
-            
-            success = self.process_single_image(image_id, image_name)
-            
-            if success:
-                self.stats['processed_successfully'] += 1
-                tqdm.write(f"✅ Processed: {image_name}")
-            else:
-                self.stats['failed_processing'] += 1
-                tqdm.write(f"❌ Failed: {image_name}")
+        rows = list(zip(df['id'], df['imagename']))
+        if incremental:
+            rows = self._pending_rows(rows, manifest_path, easyocr_batch_size)
+        
+        # Work is handed out in chunks of one EasyOCR batch
+        chunk_size = max(1, easyocr_batch_size)
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        
+        if workers > 1:
+            self.easy_reader = None  # Not needed in this process any more
+            self._run_parallel(chunks, workers, easyocr_batch_size, use_easyocr)
+        else:
+            # Process each chunk with progress bar
+            with tqdm(total=len(rows), desc="Processing images") as progress:
+                for chunk in chunks:
+                    for image_id, image_name, success, error in self.process_batch(chunk, easyocr_batch_size):
+                        self._record_result(image_id, image_name, success, error)
+                        progress.update(1)
+        
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
         
         # Record end time
         self.stats['end_time'] = time.time()
@@ -348,6 +883,114 @@ END OF EXTRACTION
         # Print final statistics
         self.print_final_stats()
     
+    def _pending_rows(self, rows, manifest_path, easyocr_batch_size):
+        """
+        Drop rows already processed with the same content and settings.
+        
+        Args:
+            rows (list): (image_id, image_name) pairs
+            manifest_path (Path): Manifest file, or None for the default
+            easyocr_batch_size (int): Part of the settings fingerprint
+        
+        Returns:
+            list: Rows that still need OCR
+        """
+        if manifest_path is None:
+            manifest_path = self.project_root / "results" / "ocr_manifest.sqlite"
+        self._manifest = OCRManifest(manifest_path)
+        self._fingerprint = self.ocr_fingerprint(easyocr_batch_size)
+        self._pending_records = {}
+        
+        pending = []
+        for image_id, image_name in tqdm(rows, desc="Checking manifest"):
+            image_path = self.images_folder / image_name
+            if not image_path.exists():
+                pending.append((image_id, image_name))  # Reported as not found
+                continue
+            key = f"{image_id}_{image_name}"
+            record = self._manifest.check(key, image_path, self._fingerprint,
+                                          self.output_path_for(image_id, image_name))
+            if record is None:
+                self.stats['skipped_unchanged'] += 1
+            else:
+                self._pending_records[key] = record
+                pending.append((image_id, image_name))
+        self._manifest.commit()
+        
+        print(f"⏭️  Skipping {self.stats['skipped_unchanged']} unchanged images; {len(pending)} to process")
+        return pending
+    
+    def _record_result(self, image_id, image_name, success, error=None):
+        """Update statistics and report one finished image."""
+        if success and error:
+            # Saved, but one engine failed: keep it out of the manifest so the next run retries it
+            self.stats['processed_successfully'] += 1
+            tqdm.write(f"⚠️  Processed with errors: {image_name} ({error})")
+        elif success:
+            self.stats['processed_successfully'] += 1
+            tqdm.write(f"✅ Processed: {image_name}")
+            key = f"{image_id}_{image_name}"
+            if self._manifest is not None and key in self._pending_records:
+                self._manifest.record(key, self._pending_records.pop(key), self._fingerprint,
+                                      self.output_path_for(image_id, image_name))
+        else:
+            self.stats['failed_processing'] += 1
+            tqdm.write(f"❌ Failed: {image_name}" + (f" ({error})" if error else ""))
+    
+    def _run_parallel(self, chunks, workers, easyocr_batch_size=1, use_easyocr=None):
+        """
+        Process the dataset on a pool of worker processes.
+        
+        Results are reported in completion order. A failing image only marks
+        that image as failed; if a worker process dies, the images still
+        pending are reported as failed instead of aborting the run. At most
+        IN_FLIGHT_PER_WORKER chunks per worker are queued at a time, so the
+        pool's bookkeeping stays small however large the dataset is.
+        
+        Args:
+            chunks (list): Lists of (image_id, image_name) rows, one task each
+            workers (int): Number of worker processes
+            easyocr_batch_size (int): Images per batched EasyOCR call
+            use_easyocr (bool): Passed to _init_worker
+        """
+        # Each worker gets an equal share of the cores for EasyOCR and for Tesseract
+        cores_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        options = {'tesseract_timeout': self.tesseract_timeout, 'easyocr_timeout': self.easyocr_timeout,
+                   'tesseract_backend': self.tesseract_backend, 'tesseract_threads': cores_per_worker}
+        initargs = (self.project_root, pytesseract.pytesseract.tesseract_cmd, cores_per_worker, options,
+                    use_easyocr)
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool, \
+                tqdm(total=sum(len(chunk) for chunk in chunks), desc="Processing images") as progress:
+            def report(results):
+                for image_id, image_name, success, error in results:
+                    self._record_result(image_id, image_name, success, error)
+                    progress.update(1)
+            
+            remaining = iter(chunks)
+            futures = {}
+            
+            def submit_next():
+                for chunk in remaining:
+                    try:
+                        futures[pool.submit(_process_in_worker, chunk, easyocr_batch_size)] = chunk
+                        return
+                    except Exception as e:  # Broken pool: fail the rest without waiting
+                        report([(image_id, image_name, False, str(e)) for image_id, image_name in chunk])
+            
+            for _ in range(workers * self.IN_FLIGHT_PER_WORKER):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = futures.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = [(image_id, image_name, False, str(e)) for image_id, image_name in chunk]
+                    report(results)
+                    submit_next()
+    
     def print_final_stats(self):
         """Print final processing statistics."""
         processing_time = self.stats['end_time'] - self.stats['start_time']
@@ -356,10 +999,15 @@ END OF EXTRACTION
         print("📊 PROCESSING COMPLETE")
         print("=" * 50)
         
+        attempted = self.stats['total_images'] - self.stats['skipped_unchanged']
+        
         print(f"Total images: {self.stats['total_images']}")
+        if self.stats['skipped_unchanged']:
+            print(f"Skipped (unchanged): {self.stats['skipped_unchanged']}")
         print(f"Successfully processed: {self.stats['processed_successfully']}")
         print(f"Failed to process: {self.stats['failed_processing']}")
-        print(f"Success rate: {(self.stats['processed_successfully'] / self.stats['total_images'] * 100):.1f}%")
+        if attempted:
+            print(f"Success rate: {(self.stats['processed_successfully'] / attempted * 100):.1f}%")
         print(f"Processing time: {processing_time:.2f} seconds")
         
         if self.stats['processed_successfully'] > 0:
@@ -377,8 +1025,30 @@ END OF EXTRACTION
             print(f"  ... and {len(result_files) - 5} more files")
 
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Batch OCR of the images listed in imagedataset.csv")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Worker processes to use (default: 1, i.e. sequential)")
+    parser.add_argument('--easyocr-batch-size', '-b', type=int, default=1,
+                        help="Images per batched EasyOCR call (default: 1, i.e. one image at a time)")
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help="Skip images already processed with the same content, engines and settings")
+    parser.add_argument('--manifest', type=Path,
+                        help="Manifest for --incremental (default: results/ocr_manifest.sqlite)")
+    parser.add_argument('--tesseract-backend', choices=['cli', 'tesserocr'], default='cli',
+                        help="'cli' starts tesseract per image; 'tesserocr' keeps engines loaded in memory")
+    parser.add_argument('--tesseract-timeout', type=float,
+                        help="Seconds before a Tesseract run is killed (default: no limit)")
+    parser.add_argument('--easyocr-timeout', type=float,
+                        help="Seconds to wait for EasyOCR on one image (default: no limit)")
+    return parser.parse_args()
+
+
 def main():
     """Main function to run the batch processing."""
+    args = parse_args()
+    
     print("🎯 OCR Batch Processing Script")
     print("===============================")
     print("This script will process all images listed in imagedataset.csv")
@@ -392,8 +1062,10 @@ def main():
         return
     
     # Initialize and run processor
-    processor = OCRProcessor()
-    processor.run_batch_processing()
+    processor = OCRProcessor(tesseract_timeout=args.tesseract_timeout, easyocr_timeout=args.easyocr_timeout,
+                             tesseract_backend=args.tesseract_backend)
+    processor.run_batch_processing(workers=args.workers, easyocr_batch_size=args.easyocr_batch_size,
+                                   incremental=args.incremental, manifest_path=args.manifest)
     
     print("\\n🎉 Batch processing complete!")
     print("📁 Check the results/extracted_texts/ folder for output files.")
@@ -3,43 +3,303 @@
 # MobileNetV2 is a powerful, lightweight model designed to run efficiently on mobile and edge devices. It is particularly popular for applications requiring real-time object detection, image classification, and other computer vision tasks, especially where computational resources are limited.
 
 
-from flask import Flask, request, jsonify, render_template
-from werkzeug.utils import secure_filename
-import tensorflow as tf
-from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input, decode_predictions
-from tensorflow.keras.preprocessing import image
+from flask import Flask, Request, Response, g, request, jsonify, render_template
+from PIL import UnidentifiedImageError
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import io
+import json
 import os
+import time
+from functools import partial
+
+from batching import MicroBatcher
+from imaging import load_image_bytes, load_image_file, preprocess_input, read_archive
+from cache import PredictionCache, cache_key
+from metrics import BATCH_SIZE, CONTENT_TYPE, IN_FLIGHT, REGISTRY, REQUESTS, REQUEST_SECONDS, STAGE_SECONDS, STARTUP_SECONDS
+from model_loader import ModelLoader, calibration_files, tflite_path_for
+from storage import UploadStore
+
+# Micro-batching settings: concurrent requests are merged into one forward pass
+# of up to MAX_BATCH_SIZE images, waiting at most MAX_WAIT_MS for stragglers.
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 16))
+MAX_WAIT_MS = float(os.environ.get('MAX_WAIT_MS', 5))
+
+# Upload handling: by default uploads are decoded straight from memory and never
+# touch the disk. SAVE_UPLOADS=1 keeps a copy in uploads/, written in the
+# background; DECODE_IN_MEMORY=0 restores the old save-then-load path.
+# Saved uploads are content-addressed (one file per distinct image) and the
+# least recently used ones are evicted past UPLOAD_STORE_MAX_MB.
+DECODE_IN_MEMORY = os.environ.get('DECODE_IN_MEMORY', '1') == '1'
+SAVE_UPLOADS = os.environ.get('SAVE_UPLOADS', '0') == '1'
+UPLOAD_FOLDER = 'uploads'
+UPLOAD_STORE_MAX_MB = int(os.environ.get('UPLOAD_STORE_MAX_MB', 1024))
+
+# Prediction cache keyed by upload content. PREDICTION_CACHE_PATH enables an
+# SQLite tier that survives restarts, holding up to PREDICTION_CACHE_DISK_SIZE
+# rows (default: PREDICTION_CACHE_SIZE).
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH') or None
+PREDICTION_CACHE_DISK_SIZE = int(os.environ.get('PREDICTION_CACHE_DISK_SIZE', 0)) or None
+
+# /predict_batch settings: images are decoded on DECODE_WORKERS threads and run
+# through the model PREDICT_BATCH_SIZE at a time.
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', 32))
+DECODE_WORKERS = int(os.environ.get('DECODE_WORKERS', os.cpu_count() or 4))
+MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', 64))
+
+# XLA_JIT=1 additionally compiles the traced inference graph with XLA.
+XLA_JIT = os.environ.get('XLA_JIT', '0') == '1'
+
+# The model is loaded in the background from a SavedModel artifact, exported on
+# first start. Delete the directory to force a rebuild.
+MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR', os.path.join('model_cache', 'mobilenet_v2'))
+
+# MODEL_BACKEND=tflite serves a .tflite conversion through the TFLite interpreter
+# instead. The file is memory-mapped, so pre-forked workers (gunicorn.conf.py)
+# share one read-only copy of the weights.
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'tf')
+
+# With the tflite backend, MODEL_QUANTIZATION picks none/dynamic/float16/int8;
+# int8 is calibrated on the images in QUANT_CALIBRATION_DIR. Check top-1
+# agreement with `python quantize.py report` before switching.
+MODEL_QUANTIZATION = os.environ.get('MODEL_QUANTIZATION', 'none')
+QUANT_CALIBRATION_DIR = os.environ.get('QUANT_CALIBRATION_DIR', UPLOAD_FOLDER)
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH') or tflite_path_for(
+    MODEL_ARTIFACT_DIR, MODEL_QUANTIZATION, calibration_files(QUANT_CALIBRATION_DIR))
+TFLITE_THREADS = int(os.environ['TFLITE_THREADS']) if os.environ.get('TFLITE_THREADS') else None
+
+
+class InMemoryRequest(Request):
+    # Werkzeug spools large multipart files to a temp file; keep them in memory.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 
 app = Flask(__name__)
-model = MobileNetV2(weights='imagenet')  # Load pre-trained MobileNetV2
+app.request_class = InMemoryRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024  # Bounds per-request memory
+# Part of every cache key, so switching backend or quantization never serves
+# predictions made by a different model
+MODEL_ID = f"mobilenet_v2/imagenet/{MODEL_BACKEND}/{MODEL_QUANTIZATION if MODEL_BACKEND == 'tflite' else 'none'}"
+
+def build_model():
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    return MobileNetV2(weights='imagenet')  # Load pre-trained MobileNetV2
+
+# Warm-up covers tracing, so the first request doesn't pay for it
+loader = ModelLoader(build_model, MODEL_ARTIFACT_DIR, warm_up_batch_sizes=(1, MAX_BATCH_SIZE, PREDICT_BATCH_SIZE), jit_compile=XLA_JIT,
+                     backend=MODEL_BACKEND, tflite_path=TFLITE_MODEL_PATH, num_threads=TFLITE_THREADS,
+                     quantization=MODEL_QUANTIZATION, calibration_dir=QUANT_CALIBRATION_DIR).start()
+
+def predict_batch(x):
+    BATCH_SIZE.observe(len(x))
+    with STAGE_SECONDS.time(stage='model_predict'):
+        return loader.infer(x)
+
+def decode_top_k(preds, k, threshold=None):
+    # One argpartition over the whole (N, 1000) matrix; see imagenet_labels.ImageNetDecoder
+    with STAGE_SECONDS.time(stage='decode_predictions'):
+        return loader.decoder.top_k(preds, k, threshold)
+
+batcher = MicroBatcher(predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+upload_writer = ThreadPoolExecutor(max_workers=1)  # Background persistence of uploads
+upload_store = UploadStore(UPLOAD_FOLDER, UPLOAD_STORE_MAX_MB * 1024 * 1024)
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_PATH,
+                                   PREDICTION_CACHE_DISK_SIZE)
+decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS)  # Parallel decode for /predict_batch
+
+def persist_upload(data, filename):
+    with STAGE_SECONDS.time(stage='file_save'):
+        return upload_store.put(data, filename)
+
+def decode_upload(data, file_path=None):
+    with STAGE_SECONDS.time(stage='load_img'):
+        return load_image_bytes(data) if file_path is None else load_image_file(file_path)
+
+def model_predict(x, batcher):
+    with STAGE_SECONDS.time(stage='preprocess_input'):
+        x = preprocess_input(x)  # Scales the float32 array in place
+    return batcher.predict(x)  # Single row of the merged batch
 
-def model_predict(img_path, model):
-    img = image.load_img(img_path, target_size=(224, 224))
-    x = image.img_to_array(img)
-    x = np.expand_dims(x, axis=0)
-    x = preprocess_input(x)
+def classify_upload(data, file_path=None):
+    # Cache lookup, decode and inference for one upload. Decodes from memory
+    # unless file_path points at a saved copy to load instead.
+    key = cache_key(data, MODEL_ID)
+    preds = prediction_cache.get(key)
+    if preds is None:
+        x = decode_upload(data, file_path)
+        preds = model_predict(x, batcher)
+        prediction_cache.put(key, preds)
+    return preds
 
-    preds = model.predict(x)
-    return decode_predictions(preds, top=1)[0][0]
+def top_prediction(preds):
+    return decode_top_k(preds[np.newaxis], 1).rows()[0][0]
+
+def render_metrics():
+    for phase, seconds in list(loader.phases.items()):
+        STARTUP_SECONDS.set(seconds, phase=phase)
+    return REGISTRY.render()
+
+def start_batch_chunk(items):
+    # Look up each image in the cache and queue decodes for the misses, so the
+    # next chunk decodes while the current one runs through the model.
+    jobs = []
+    for name, data in items:
+        key = cache_key(data, MODEL_ID)
+        preds = prediction_cache.get(key)
+        future = decode_pool.submit(decode_upload, data) if preds is None else None
+        jobs.append((name, key, preds, future))
+    return jobs
+
+def finish_batch_chunk(jobs, top_k, min_prob=None):
+    decoded, errors = [], {}
+    for i, (name, _, _, future) in enumerate(jobs):
+        if future is None:
+            continue
+        try:
+            decoded.append((i, future.result()))
+        except Exception as e:
+            errors[i] = f"Could not decode image: {e}"
+
+    rows = {}
+    if decoded:
+        with STAGE_SECONDS.time(stage='preprocess_input'):
+            x = preprocess_input(np.stack([arr for _, arr in decoded]))
+        for (i, _), row in zip(decoded, predict_batch(x)):
+            rows[i] = row
+            prediction_cache.put(jobs[i][1], row)
+
+    ok = [i for i in range(len(jobs)) if i not in errors]
+    top = None
+    if ok:
+        top = decode_top_k(np.stack([jobs[i][2] if jobs[i][2] is not None else rows[i] for i in ok]),
+                           top_k, min_prob)
+    position = {i: n for n, i in enumerate(ok)}
+    for i, (name, _, _, _) in enumerate(jobs):
+        if i in errors:
+            yield {"name": name, "error": errors[i]}
+            continue
+        n = position[i]
+        labels, probs, keep = top.labels[n], top.probabilities[n].tolist(), top.mask[n]
+        yield {"name": name, "predictions": [{"label": str(labels[j]), "probability": probs[j]}
+                                             for j in range(len(probs)) if keep[j]]}
+
+def batch_result_chunks(items, top_k, min_prob=None):
+    # One list of results per PREDICT_BATCH_SIZE chunk; the next chunk decodes
+    # while the current one runs through the model.
+    chunks = [items[i:i + PREDICT_BATCH_SIZE] for i in range(0, len(items), PREDICT_BATCH_SIZE)]
+    next_jobs = start_batch_chunk(chunks[0])
+    for n in range(len(chunks)):
+        jobs = next_jobs
+        if n + 1 < len(chunks):
+            next_jobs = start_batch_chunk(chunks[n + 1])
+        yield list(finish_batch_chunk(jobs, top_k, min_prob))
+
+def generate_batch_results(items, top_k, min_prob=None):
+    for results in batch_result_chunks(items, top_k, min_prob):
+        for result in results:
+            yield json.dumps(result) + '\n'
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    IN_FLIGHT.inc()
+
+def finish_request_metrics(endpoint, status, start):
+    IN_FLIGHT.dec()
+    REQUESTS.inc(endpoint=endpoint, status=status)
+    REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+
+@app.after_request
+def record_request_metrics(response):
+    finish = partial(finish_request_metrics, request.endpoint or 'unknown', response.status_code, g.request_start)
+    if response.is_streamed:
+        # Streamed bodies (/predict_batch) are generated after this hook and
+        # teardown have run; record the request once the body is done.
+        response.call_on_close(finish)
+    else:
+        finish()
+    g.request_recorded = True
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    if not g.get('request_recorded'):  # No response was built
+        IN_FLIGHT.dec()
 
 @app.route('/', methods=['GET'])
 def index():
     return render_template('index.html')
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    status = loader.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/predict', methods=['POST'])
 def upload():
+    if not loader.ready.is_set():
+        return jsonify({"error": "Model is loading"}), 503
     if 'file' not in request.files:
         return jsonify({"error": "No file part"})
     file = request.files['file']
     if file.filename == '':
         return jsonify({"error": "No selected file"})
     if file:
-        filename = secure_filename(file.filename)
-        file_path = os.path.join('uploads', filename)
-        file.save(file_path)
-        result = model_predict(file_path, model)
+        data = file.read()
+        file_path = None
+        if not DECODE_IN_MEMORY:
+            file_path = persist_upload(data, file.filename)
+        elif SAVE_UPLOADS:
+            upload_writer.submit(persist_upload, data, file.filename)
+
+        try:
+            preds = classify_upload(data, file_path)
+        except UnidentifiedImageError:
+            return jsonify({"error": "Unsupported image format"}), 400
+        result = top_prediction(preds)
         return jsonify({"result": result[1]})
 
+@app.route('/predict_batch', methods=['POST'])
+def upload_batch():
+    # Accepts any number of 'files' parts and/or one zip/tar 'archive' part, and
+    # streams one NDJSON line per image as each batch finishes. Optional query
+    # parameters: top_k (default 5) and min_prob, which drops predictions below
+    # that probability.
+    if not loader.ready.is_set():
+        return jsonify({"error": "Model is loading"}), 503
+    try:
+        top_k = int(request.args.get('top_k', 5))
+        min_prob = float(request.args.get('min_prob', 0))
+    except ValueError:
+        return jsonify({"error": "top_k must be an integer and min_prob a number"}), 400
+    top_k = min(max(top_k, 1), 1000)
+
+    items = [(file.filename, file.read()) for file in request.files.getlist('files') if file.filename]
+    archive = request.files.get('archive')
+    if archive and archive.filename:
+        try:
+            items.extend(read_archive(archive.read()))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "No images in request"}), 400
+
+    return Response(generate_batch_results(items, top_k, min_prob), mimetype='application/x-ndjson')
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+@app.route('/upload_stats', methods=['GET'])
+def upload_stats():
+    return jsonify(upload_store.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
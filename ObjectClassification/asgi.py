@@ -0,0 +1,227 @@
+# Async (ASGI) serving mode for the classification app
+# ====================================================
+# Alternative entry point to app.py's Flask dev server. Request I/O runs on the
+# event loop, while decode and inference are offloaded to a bounded thread pool,
+# so a slow upload never blocks other requests.
+#
+# Usage:
+#   uvicorn asgi:app --host 0.0.0.0 --port 8000
+#
+# Settings (environment variables):
+#   ASYNC_WORKERS      threads for decode/inference (default: CPU count)
+#   ASYNC_MAX_PENDING  requests admitted at once, counting work still running for
+#                      requests that timed out; extra ones get 503 (default: 64)
+#   REQUEST_TIMEOUT    seconds allowed for reading the upload and for inference (default: 30)
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from PIL import UnidentifiedImageError
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as classifier
+from imaging import read_archive
+from metrics import CONTENT_TYPE, IN_FLIGHT, REQUESTS, REQUEST_SECONDS
+
+ASYNC_WORKERS = int(os.environ.get('ASYNC_WORKERS', os.cpu_count() or 4))
+ASYNC_MAX_PENDING = int(os.environ.get('ASYNC_MAX_PENDING', 64))
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', 30))
+MAX_UPLOAD_BYTES = classifier.MAX_UPLOAD_MB * 1024 * 1024
+
+executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='asgi-worker')
+pending = 0  # Admitted requests; only touched from the event loop thread
+orphaned = 0  # Executor jobs still running after their request timed out
+
+
+def release_orphan():
+    global orphaned
+    orphaned -= 1
+
+
+def error(message, status_code):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+async def run_blocking(fn, *args):
+    """Run CPU-bound work on the bounded executor with the request timeout."""
+    global orphaned
+    loop = asyncio.get_running_loop()
+    future = executor.submit(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        # A job that already started cannot be stopped: keep it counted against
+        # ASYNC_MAX_PENDING until its thread is actually free again.
+        if not future.cancel():
+            orphaned += 1
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(release_orphan))
+        raise
+
+
+async def read_form(request):
+    content_length = int(request.headers.get('content-length') or 0)
+    if content_length > MAX_UPLOAD_BYTES:
+        raise ValueError('Upload too large')
+    return await asyncio.wait_for(request.form(), REQUEST_TIMEOUT)
+
+
+async def release_after(body, release):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        release()
+
+
+def admitted(handler):
+    # Backpressure: reject instead of queueing without bound once saturated.
+    async def wrapper(request):
+        global pending
+        endpoint = handler.__name__
+        if not classifier.loader.ready.is_set():
+            REQUESTS.inc(endpoint=endpoint, status=503)
+            return error("Model is loading", 503)
+        if pending + orphaned >= ASYNC_MAX_PENDING:
+            REQUESTS.inc(endpoint=endpoint, status=503)
+            return JSONResponse({"error": "Server busy"}, status_code=503, headers={'Retry-After': '1'})
+        pending += 1
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        released = False
+
+        def release(status):
+            global pending
+            nonlocal released
+            if not released:
+                released = True
+                pending -= 1
+                IN_FLIGHT.dec()
+                REQUESTS.inc(endpoint=endpoint, status=status)
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+
+        try:
+            response = await handler(request)
+        except asyncio.TimeoutError:
+            response = error("Request timed out", 504)
+        except BaseException:
+            release(500)
+            raise
+        finish = partial(release, response.status_code)
+        if isinstance(response, StreamingResponse):
+            # The body is produced after we return: hold the slot, and leave the
+            # request unrecorded, until it has been sent. The background task
+            # covers a client that disconnects before the first chunk, when the
+            # generator never runs.
+            response.body_iterator = release_after(response.body_iterator, finish)
+            response.background = BackgroundTask(finish)
+        else:
+            finish()
+        return response
+    return wrapper
+
+
+async def index(request):
+    return FileResponse(os.path.join(os.path.dirname(__file__), 'templates', 'index.html'))
+
+
+@admitted
+async def predict(request):
+    try:
+        form = await read_form(request)
+    except ValueError as e:
+        return error(str(e), 413)
+    file = form.get('file')
+    if file is None or isinstance(file, str):
+        return error("No file part", 400)
+    if not file.filename:
+        return error("No selected file", 400)
+
+    data = await file.read()
+    if classifier.SAVE_UPLOADS:
+        classifier.upload_writer.submit(classifier.persist_upload, data, file.filename)
+    try:
+        preds = await run_blocking(classifier.classify_upload, data)
+    except UnidentifiedImageError:
+        return error("Unsupported image format", 400)
+    result = classifier.top_prediction(preds)
+    return JSONResponse({"result": result[1]})
+
+
+@admitted
+async def predict_batch(request):
+    try:
+        top_k = min(max(int(request.query_params.get('top_k', 5)), 1), 1000)
+        min_prob = float(request.query_params.get('min_prob', 0))
+    except ValueError:
+        return error("top_k must be an integer and min_prob a number", 400)
+    try:
+        form = await read_form(request)
+    except ValueError as e:
+        return error(str(e), 413)
+
+    items = []
+    for file in form.getlist('files'):
+        if not isinstance(file, str) and file.filename:
+            items.append((file.filename, await file.read()))
+    archive = form.get('archive')
+    if archive is not None and not isinstance(archive, str) and archive.filename:
+        try:
+            items.extend(await run_blocking(read_archive, await archive.read()))
+        except ValueError as e:
+            return error(str(e), 400)
+    if not items:
+        return error("No images in request", 400)
+
+    return StreamingResponse(stream_batch_results(items, top_k, min_prob), media_type='application/x-ndjson')
+
+
+async def stream_batch_results(items, top_k, min_prob):
+    # Each chunk runs on the bounded executor under the request timeout, rather
+    # than on Starlette's own thread pool with no limit.
+    chunks = classifier.batch_result_chunks(items, top_k, min_prob)
+    while True:
+        try:
+            results = await run_blocking(next, chunks, None)
+        except asyncio.TimeoutError:
+            # Headers are already sent; report the timeout in the stream
+            yield json.dumps({"error": "Request timed out"}) + '\n'
+            return
+        if results is None:
+            return
+        for result in results:
+            yield json.dumps(result) + '\n'
+
+
+async def ready(request):
+    status = classifier.loader.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
+
+async def cache_stats(request):
+    return JSONResponse(classifier.prediction_cache.stats())
+
+
+async def upload_stats(request):
+    return JSONResponse(classifier.upload_store.stats())
+
+
+async def metrics(request):
+    return Response(classifier.render_metrics(), headers={'Content-Type': CONTENT_TYPE})
+
+
+app = Starlette(routes=[
+    Route('/', index, methods=['GET']),
+    Route('/ready', ready, methods=['GET']),
+    Route('/predict', predict, methods=['POST']),
+    Route('/predict_batch', predict_batch, methods=['POST']),
+    Route('/cache_stats', cache_stats, methods=['GET']),
+    Route('/upload_stats', upload_stats, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+])
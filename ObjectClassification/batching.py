@@ -0,0 +1,72 @@
+# Dynamic micro-batching for MobileNetV2 inference
+# ================================================
+# Concurrent /predict requests each carry a single preprocessed image. Running
+# the model once per request wastes most of the forward pass, so requests are
+# put on a queue and a background worker merges whatever arrives within a short
+# window into one batched call.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collects single-image requests and runs them through the model in batches.
+
+    Args:
+        predict_fn (callable): Takes an (N, H, W, C) array and returns an
+            (N, num_classes) array of predictions.
+        max_batch_size (int): Largest batch handed to ``predict_fn``.
+        max_wait_ms (float): How long the worker waits for more requests after
+            the first one of a batch arrives.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, x):
+        """Queue one preprocessed image of shape (H, W, C); returns a Future."""
+        future = Future()
+        self._queue.put((x, future))
+        return future
+
+    def predict(self, x, timeout=None):
+        """Blocking helper: submit one image and wait for its prediction row."""
+        return self.submit(x).result(timeout=timeout)
+
+    def _collect(self):
+        # Block for the first request, then keep pulling until the batch is full
+        # or the wait window closes.
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                x = np.stack([item for item, _ in batch])
+                preds = self.predict_fn(x)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, row in zip(futures, preds):
+                future.set_result(row)
@@ -0,0 +1,76 @@
+# Inference latency comparison: model.predict vs compiled tf.function
+# ===================================================================
+# Usage:
+#   python benchmark_inference.py                     # MobileNetV2, batch 1
+#   python benchmark_inference.py --model resnet50 --batch-sizes 1 8 --runs 200
+
+import argparse
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from inference import compile_inference, warm_up
+
+MODELS = {
+    'mobilenet_v2': tf.keras.applications.MobileNetV2,
+    'resnet50': tf.keras.applications.ResNet50,
+}
+
+
+def measure(fn, x, runs):
+    """Call fn(x) `runs` times and return the latencies in milliseconds."""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(x)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def summarize(latencies):
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare model.predict and compiled inference latency')
+    parser.add_argument('--model', '-m', choices=sorted(MODELS), default='mobilenet_v2')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1])
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--xla', action='store_true', help='Compile the traced graph with XLA')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    model = MODELS[args.model](weights='imagenet')
+    infer = compile_inference(model, jit_compile=args.xla)
+    paths = {
+        'model.predict': lambda x: model.predict(x, verbose=0),
+        'compiled': infer,
+    }
+
+    results = []
+    for batch_size in args.batch_sizes:
+        x = np.random.uniform(-1, 1, size=(batch_size, 224, 224, 3)).astype(np.float32)
+        warm_up(infer, batch_sizes=(batch_size,))
+        model.predict(x, verbose=0)
+        for name, fn in paths.items():
+            stats = summarize(measure(fn, x, args.runs))
+            results.append({'model': args.model, 'path': name, 'batch_size': batch_size, **stats})
+
+    print(f"{'path':<15}{'batch':>6}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    print('-' * 51)
+    for r in results:
+        print(f"{r['path']:<15}{r['batch_size']:>6}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['mean_ms']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
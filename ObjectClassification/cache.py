@@ -0,0 +1,173 @@
+# Content-hash prediction cache
+# =============================
+# Clients often resubmit the same image. Predictions are cached under a hash of
+# the raw upload bytes plus the model identity, so a repeat upload skips both
+# preprocessing and the forward pass.
+
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+import numpy as np
+
+
+def cache_key(data, model_id):
+    """SHA-256 of the model identity followed by the raw upload bytes."""
+    h = hashlib.sha256(model_id.encode('utf-8'))
+    h.update(b'\0')
+    h.update(data)
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """In-memory LRU cache of prediction rows with TTL expiry.
+
+    Args:
+        max_entries (int): Entries kept in memory before the least recently
+            used one is evicted.
+        ttl_seconds (float): Age after which an entry is treated as missing.
+        disk_path (str): Optional SQLite file used as a second tier that
+            survives restarts. Memory misses fall back to it.
+        disk_max_entries (int): Rows kept in the disk tier. Expired rows and
+            the oldest ones past this are pruned every PRUNE_EVERY writes.
+            Defaults to max_entries.
+    """
+
+    WRITE_QUEUE_SIZE = 1024  # Disk writes waiting; further ones are dropped
+    PRUNE_EVERY = 256  # Disk rows written between prunes
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_path=None, disk_max_entries=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()  # key -> (stored_at, preds)
+        self._lock = threading.Lock()
+        self.stats_counts = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_dropped': 0,
+                             'disk_errors': 0}
+
+        self._db = None
+        if disk_path:
+            self.disk_max_entries = max(1, int(disk_max_entries or self.max_entries))
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db_lock = threading.Lock()
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS predictions '
+                '(key TEXT PRIMARY KEY, stored_at REAL, preds BLOB)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS predictions_stored_at ON predictions (stored_at)')
+            self._prune()
+            # Misses are written by a background thread, so a slow disk never
+            # holds up lookups or the request that computed the prediction.
+            self._writes = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+            threading.Thread(target=self._write_loop, name='prediction-cache-writer', daemon=True).start()
+
+    def _expired(self, stored_at, now):
+        return now - stored_at > self.ttl
+
+    def get(self, key):
+        """Return the cached prediction row for ``key`` or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.stats_counts['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    row = self._db.execute(
+                        'SELECT stored_at, preds FROM predictions WHERE key = ?', (key,)
+                    ).fetchone()
+            except sqlite3.Error as e:
+                # e.g. locked by another worker sharing the file: treat as a miss
+                self._disk_error('read', e)
+                row = None
+            if row is not None and not self._expired(row[0], now):
+                preds = np.frombuffer(row[1], dtype=np.float32)
+                with self._lock:
+                    self._insert(key, row[0], preds)
+                    self.stats_counts['disk_hits'] += 1
+                return preds
+
+        with self._lock:
+            self.stats_counts['misses'] += 1
+        return None
+
+    def put(self, key, preds):
+        """Store a prediction row (1-D array of class probabilities)."""
+        preds = np.asarray(preds, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            self._insert(key, now, preds)
+        if self._db is not None:
+            try:
+                self._writes.put_nowait((key, now, preds.tobytes()))
+            except queue.Full:
+                with self._lock:
+                    self.stats_counts['disk_dropped'] += 1
+
+    def _write_loop(self):
+        written = 0
+        while True:
+            rows = [self._writes.get()]
+            while True:  # Commit whatever else is waiting in the same transaction
+                try:
+                    rows.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            # Errors (a locked database, a full disk) lose this batch but must
+            # not end the thread, or every later write would be dropped too
+            try:
+                with self._db_lock, self._db:  # Commits, or rolls back on error
+                    self._db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)', rows)
+            except sqlite3.Error as e:
+                self._disk_error(f'write of {len(rows)} rows', e)
+                continue
+            written += len(rows)
+            if written >= self.PRUNE_EVERY:
+                self._prune()
+                written = 0
+
+    def _disk_error(self, operation, error):
+        with self._lock:
+            self.stats_counts['disk_errors'] += 1
+        print(f'Prediction cache disk {operation} failed: {type(error).__name__}: {error}')
+        if not isinstance(error, sqlite3.OperationalError):
+            traceback.print_exc()
+
+    def _prune(self):
+        # Drop expired rows, then the oldest ones beyond disk_max_entries
+        try:
+            with self._db_lock, self._db:
+                self._db.execute('DELETE FROM predictions WHERE stored_at < ?', (time.time() - self.ttl,))
+                self._db.execute(
+                    'DELETE FROM predictions WHERE key IN '
+                    '(SELECT key FROM predictions ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                    (self.disk_max_entries,),
+                )
+        except sqlite3.Error as e:
+            self._disk_error('prune', e)  # Retried after the next PRUNE_EVERY writes
+
+    def _insert(self, key, stored_at, preds):
+        self._entries[key] = (stored_at, preds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats_counts['evictions'] += 1
+
+    def stats(self):
+        """Counters plus current size, for the /cache_stats endpoint."""
+        with self._lock:
+            stats = dict(self.stats_counts)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,31 @@
+# Pre-fork serving mode for the classification app
+# ================================================
+# Usage:
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The master exports model_cache/mobilenet_v2.tflite once, in a subprocess so it
+# never imports TensorFlow itself, and then forks the workers. Every worker
+# memory-maps the same .tflite file, so the weights live once in the page cache
+# instead of once per process.
+#
+# Settings (environment variables): WORKERS, WORKER_THREADS, BIND, plus the
+# MODEL_BACKEND / TFLITE_* settings read by app.py.
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+os.environ.setdefault('MODEL_BACKEND', 'tflite')
+os.environ.setdefault('TFLITE_THREADS', '1')  # One worker per core does the parallelism
+
+bind = os.environ.get('BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('WORKER_THREADS', 4))  # Lets each worker's micro-batcher merge requests
+timeout = 120
+
+
+def on_starting(server):
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, 'prefork.py', 'export'], check=True, cwd=here)
@@ -0,0 +1,66 @@
+# ImageNet label decoding without TensorFlow
+# ==========================================
+# Same output as keras' decode_predictions, but reads the class index from a
+# local JSON file so processes serving the TFLite backend never import Keras.
+# Top-k selection runs once over the whole (N, 1000) batch with argpartition
+# instead of fully sorting one row at a time.
+
+import json
+from collections import namedtuple
+
+import numpy as np
+
+CLASS_INDEX_URL = 'https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json'
+CLASS_INDEX_FILENAME = 'imagenet_class_index.json'
+
+# imagenet_classifier/utils/decoding.py carries a copy of TopK and top_k: the two
+# projects are installed and deployed separately and share no package. Keep the
+# copies in sync; only class index loading differs.
+
+
+class TopK(namedtuple('TopK', ['indices', 'probabilities', 'labels', 'wnids', 'mask'])):
+    """Columnar top-k results; every field is an (N, k) array, best class first.
+
+    `mask` is False where a prediction fell below the decoder's threshold.
+    """
+
+    def rows(self):
+        """Per-image lists of (wnid, label, prob), as keras' decode_predictions returns."""
+        return [[(w, l, p) for w, l, p, keep in zip(wnids, labels, probs, mask) if keep]
+                for wnids, labels, probs, mask in zip(self.wnids, self.labels, self.probabilities, self.mask)]
+
+
+class ImageNetDecoder:
+    """Batch top-k decoder over a preloaded class index.
+
+    Args:
+        class_index_path (str): Local imagenet_class_index.json
+    """
+
+    def __init__(self, class_index_path):
+        with open(class_index_path) as f:
+            class_index = json.load(f)
+        self.wnids = np.array([class_index[str(i)][0] for i in range(len(class_index))])
+        self.labels = np.array([class_index[str(i)][1] for i in range(len(class_index))])
+
+    def top_k(self, preds, k=5, threshold=None):
+        """
+        Select the k most probable classes of every row at once.
+
+        Args:
+            preds (numpy.ndarray): (N, classes) probabilities
+            k (int): Classes kept per row
+            threshold (float): Optionally mask out predictions below this probability
+
+        Returns:
+            TopK: (N, k) indices, probabilities, labels, wnids and mask
+        """
+        preds = np.asarray(preds)
+        k = min(k, preds.shape[1])
+        indices = np.argpartition(preds, -k, axis=1)[:, -k:]
+        probs = np.take_along_axis(preds, indices, axis=1)
+        order = np.argsort(-probs, axis=1)  # Only k columns left to sort
+        indices = np.take_along_axis(indices, order, axis=1)
+        probs = np.take_along_axis(probs, order, axis=1)
+        mask = probs >= threshold if threshold else np.ones(probs.shape, dtype=bool)
+        return TopK(indices, probs, self.labels[indices], self.wnids[indices], mask)
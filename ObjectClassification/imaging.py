@@ -0,0 +1,95 @@
+# Image decoding helpers for the classification app
+# =================================================
+# Uploads can be decoded straight from memory, so /predict never has to write
+# the file to uploads/ and read it back just to build the input tensor.
+
+import io
+import os
+import tarfile
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+TARGET_SIZE = (224, 224)  # MobileNetV2 input resolution
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp'}
+MAX_ARCHIVE_BYTES = 512 * 1024 * 1024  # Uncompressed size limit for uploaded archives
+
+
+def _to_array(img, target_size):
+    # Same conversions as keras' load_img (RGB, nearest-neighbour resize) so the
+    # in-memory and on-disk paths produce identical tensors.
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    width_height = (target_size[1], target_size[0])
+    if img.size != width_height:
+        img = img.resize(width_height, Image.NEAREST)
+    # The uint8 -> float32 conversion is the only copy made after decoding;
+    # preprocess_input then scales this array in place.
+    return np.asarray(img, dtype=np.float32)
+
+
+def load_image_bytes(data, target_size=TARGET_SIZE):
+    """
+    Decode an image held in memory into a float32 (H, W, 3) array.
+
+    Args:
+        data (bytes | io.BytesIO): Raw encoded image or a binary stream over it
+        target_size (tuple): (height, width) to resize to
+
+    Returns:
+        numpy.ndarray: Decoded image, not yet preprocessed
+    """
+    stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+    with Image.open(stream) as img:
+        return _to_array(img, target_size)
+
+
+def load_image_file(img_path, target_size=TARGET_SIZE):
+    """Decode an image file on disk into a float32 (H, W, 3) array."""
+    with Image.open(img_path) as img:
+        return _to_array(img, target_size)
+
+
+def preprocess_input(x):
+    """MobileNetV2 preprocessing (scale pixels to [-1, 1]) in place, without TensorFlow."""
+    x /= 127.5
+    x -= 1.0
+    return x
+
+
+def _is_image_name(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def read_archive(data, max_total_bytes=MAX_ARCHIVE_BYTES):
+    """
+    Extract the image members of an in-memory zip or tar archive.
+
+    Args:
+        data (bytes): Raw archive (zip, or tar with optional gz/bz2/xz compression)
+        max_total_bytes (int): Limit on the summed uncompressed image size
+
+    Returns:
+        list: (member name, bytes) pairs in archive order
+
+    Raises:
+        ValueError: If the archive is unreadable or exceeds ``max_total_bytes``
+    """
+    stream = io.BytesIO(data)
+    if zipfile.is_zipfile(stream):
+        with zipfile.ZipFile(stream) as zf:
+            members = [info for info in zf.infolist() if not info.is_dir() and _is_image_name(info.filename)]
+            if sum(info.file_size for info in members) > max_total_bytes:
+                raise ValueError('Archive is too large')
+            return [(info.filename, zf.read(info)) for info in members]
+
+    stream.seek(0)
+    try:
+        with tarfile.open(fileobj=stream) as tar:
+            members = [m for m in tar.getmembers() if m.isfile() and _is_image_name(m.name)]
+            if sum(m.size for m in members) > max_total_bytes:
+                raise ValueError('Archive is too large')
+            return [(m.name, tar.extractfile(m).read()) for m in members]
+    except tarfile.TarError:
+        raise ValueError('Archive must be a zip or tar file')
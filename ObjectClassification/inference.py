@@ -0,0 +1,129 @@
+# Compiled inference for Keras models
+# ===================================
+# model.predict builds a data adapter and callback machinery on every call,
+# which dominates latency for a handful of images. Serving goes through a
+# tf.function traced once for a fixed input signature instead.
+
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+
+from imagenet_labels import CLASS_INDEX_FILENAME, CLASS_INDEX_URL
+
+QUANTIZATIONS = ('none', 'dynamic', 'float16', 'int8')
+
+
+def _serving_function(model, input_shape, jit_compile):
+    signature = [tf.TensorSpec(shape=(None,) + tuple(input_shape), dtype=tf.float32)]
+
+    @tf.function(input_signature=signature, jit_compile=jit_compile)
+    def serve(x):
+        return model(x, training=False)
+
+    return serve
+
+
+def _wrap(serve):
+    def infer(x):
+        return serve(tf.convert_to_tensor(x, dtype=tf.float32)).numpy()
+
+    infer.serve = serve
+    return infer
+
+
+def compile_inference(model, input_shape=(224, 224, 3), jit_compile=False):
+    """
+    Wrap a Keras model in a tf.function with a fixed input signature.
+
+    The batch dimension is left open, so one trace serves every batch size.
+
+    Args:
+        model (tf.keras.Model): Model to wrap
+        input_shape (tuple): Per-image input shape
+        jit_compile (bool): Also compile the graph with XLA
+
+    Returns:
+        callable: Maps a float32 (N, *input_shape) array to an (N, classes) array
+    """
+    return _wrap(_serving_function(model, input_shape, jit_compile))
+
+
+def export_inference(model, path, input_shape=(224, 224, 3), jit_compile=False):
+    """
+    Save the traced serving function and weights as a SavedModel.
+
+    The artifact is written to a temporary directory and renamed into place, so
+    an interrupted export never leaves a half-written model behind. If another
+    process (a reloader, a sibling worker) got there first, its artifact is
+    kept and this export is discarded.
+    """
+    module = tf.Module()
+    module.model = model
+    module.serve = _serving_function(model, input_shape, jit_compile)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    tf.saved_model.save(module, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # A directory can't be replaced once it exists and is non-empty
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+
+
+def export_tflite(saved_model_dir, tflite_path, quantization='none', representative_data=None):
+    """
+    Convert an export_inference artifact to a .tflite file (written atomically).
+
+    Args:
+        saved_model_dir (str): Artifact written by export_inference
+        tflite_path (str): Output file
+        quantization (str): One of QUANTIZATIONS:
+            'none'    - float32 weights and activations
+            'dynamic' - int8 weights, float activations
+            'float16' - float16 weights (expanded to float32 at load time by
+                        the builtin kernels, so they are not shared between workers)
+            'int8'    - int8 weights and activations, calibrated on
+                        ``representative_data``; input and output stay float32
+        representative_data (numpy.ndarray): Preprocessed (N, H, W, C) images,
+            required for 'int8'
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f'Unknown quantization: {quantization}')
+    loaded = tf.saved_model.load(saved_model_dir)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [loaded.serve.get_concrete_function()], loaded)
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if representative_data is None or len(representative_data) == 0:
+            raise ValueError('int8 quantization needs representative images for calibration')
+        converter.representative_dataset = lambda: ([x[np.newaxis]] for x in representative_data)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    tflite_model = converter.convert()
+    tmp_path = f'{tflite_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(tflite_model)
+    os.replace(tmp_path, tflite_path)
+
+
+def fetch_class_index(dest_path):
+    """Copy the ImageNet class index next to exported models for TF-free decoding."""
+    cached = tf.keras.utils.get_file(CLASS_INDEX_FILENAME, CLASS_INDEX_URL, cache_subdir='models')
+    shutil.copyfile(cached, dest_path)
+
+
+def load_inference(path):
+    """Load an artifact written by export_inference without rebuilding the Keras model."""
+    return _wrap(tf.saved_model.load(path).serve)
+
+
+def warm_up(infer, input_shape=(224, 224, 3), batch_sizes=(1,)):
+    """Run dummy batches so tracing and kernel setup happen before real requests."""
+    for batch_size in batch_sizes:
+        infer(np.zeros((batch_size,) + tuple(input_shape), dtype=np.float32))
@@ -0,0 +1,303 @@
+# Load-testing harness for the classification service
+# ===================================================
+# Starts the app locally (or targets a running one), sweeps client concurrency,
+# and reports throughput, p50/p95/p99 latency, error rate and server CPU/RSS
+# as JSON, so runs from different versions can be diffed.
+#
+# Usage:
+#   python loadtest.py                                   # Flask server, /predict
+#   python loadtest.py --server asgi --concurrency 1 4 16 64
+#   python loadtest.py --server gunicorn --endpoint predict_batch --batch-size 16
+#   python loadtest.py --synthetic 50 --json results/loadtest.json
+#   python loadtest.py --url http://host:8000 --pid 1234  # existing server
+#
+# Every request gets a few random trailing bytes after the image, which the
+# decoder ignores but which change the content hash, so the prediction cache
+# doesn't turn the test into a cache benchmark. Pass --allow-cache-hits to
+# measure the cached path instead.
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+from imaging import IMAGE_EXTENSIONS
+
+SERVER_COMMANDS = {
+    'flask': [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--no-debugger', '--no-reload',
+              '--with-threads', '--port', '{port}'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '{port}'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{port}', 'app:app'],
+}
+
+
+def encode_multipart(field, files):
+    """Encode (filename, bytes) pairs under one form field; returns (body, content_type)."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for filename, data in files:
+        parts.append((f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                      'Content-Type: application/octet-stream\r\n\r\n').encode())
+        parts.append(data)
+        parts.append(b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def load_images(image_dir):
+    """Raw bytes of every image under image_dir, including content-addressed shards."""
+    images = []
+    for root, _, files in os.walk(image_dir):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images
+
+
+def synthetic_jpegs(count, size=(640, 480), seed=0):
+    """Random-noise JPEGs; deterministic for a given seed so runs are comparable."""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, format='JPEG', quality=90)
+        images.append(buf.getvalue())
+    return images
+
+
+# -- Server process stats (Linux /proc) ---------------------------------------
+
+def child_pids(parent_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The ppid is the second field after the parenthesised command name
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in child_pids(pid):
+        pids.extend(process_tree(child))
+    return pids
+
+
+def memory_stats(pid):
+    """RSS, PSS and private memory of a process in MB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': fields.get('Rss', 0.0),
+        'pss_mb': fields.get('Pss', 0.0),
+        'private_mb': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+
+def cpu_seconds(pids):
+    ticks = os.sysconf('SC_CLK_TCK')
+    total = 0.0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def total_rss_mb(pids):
+    total = 0.0
+    for pid in pids:
+        try:
+            total += memory_stats(pid)['rss_mb']
+        except OSError:
+            continue
+    return total
+
+
+# -- Load generation ----------------------------------------------------------
+
+def wait_ready(base_url, timeout=300, streak_needed=1):
+    """Poll /ready until it answers 200 `streak_needed` times in a row."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'{base_url}/ready', timeout=5):
+                streak += 1
+        except (urllib.error.URLError, ConnectionError):
+            streak = 0
+        if streak >= streak_needed:
+            return
+        time.sleep(0.1 if streak else 1.0)
+    raise TimeoutError('Server did not become ready')
+
+
+def run_level(base_url, endpoint, images, concurrency, duration, batch_size=1, bust_cache=True, server_pid=None):
+    """Drive one concurrency level for `duration` seconds and summarise it."""
+    field = 'file' if endpoint == 'predict' else 'files'
+    url = f'{base_url}/{endpoint}'
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(worker_id):
+        i = worker_id
+        while time.monotonic() < deadline:
+            files = []
+            for _ in range(batch_size):
+                data = images[i % len(images)]
+                i += concurrency
+                files.append(('load.jpg', data + uuid.uuid4().bytes if bust_cache else data))
+            body, content_type = encode_multipart(field, files)
+            req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=120) as resp:
+                    resp.read()
+                    ok = resp.status == 200
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    pids = process_tree(server_pid) if server_pid else []
+    cpu_before = cpu_seconds(pids)
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - start
+
+    ok = len(latencies)
+    lat_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    result = {
+        'concurrency': concurrency,
+        'requests': ok,
+        'errors': errors[0],
+        'error_rate': errors[0] / (ok + errors[0]) if ok + errors[0] else 0.0,
+        'throughput_rps': ok / wall,
+        'images_per_second': ok * batch_size / wall,
+        'p50_ms': float(np.percentile(lat_ms, 50)),
+        'p95_ms': float(np.percentile(lat_ms, 95)),
+        'p99_ms': float(np.percentile(lat_ms, 99)),
+    }
+    if server_pid:
+        pids = process_tree(server_pid)
+        result['server_cpu_percent'] = 100 * (cpu_seconds(pids) - cpu_before) / wall
+        result['server_rss_mb'] = total_rss_mb(pids)
+    return result
+
+
+def start_server(kind, port):
+    here = os.path.dirname(os.path.abspath(__file__))
+    cmd = [part.format(port=port) for part in SERVER_COMMANDS[kind]]
+    return subprocess.Popen(cmd, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the /predict and /predict_batch endpoints')
+    parser.add_argument('--server', choices=sorted(SERVER_COMMANDS), default='flask', help='Server to start locally')
+    parser.add_argument('--url', help='Target an already running server instead of starting one')
+    parser.add_argument('--pid', type=int, help='Server PID for CPU/RSS stats when using --url')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--endpoint', choices=['predict', 'predict_batch'], default='predict')
+    parser.add_argument('--batch-size', type=int, default=8, help='Images per /predict_batch request')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per concurrency level')
+    parser.add_argument('--images', default='uploads', help='Directory of test images')
+    parser.add_argument('--synthetic', type=int, default=0, help='Use N synthetic JPEGs instead of --images')
+    parser.add_argument('--allow-cache-hits', action='store_true', help='Send identical bytes for repeat images')
+    parser.add_argument('--json', help='Write the report to this file (default: stdout)')
+    args = parser.parse_args()
+
+    images = synthetic_jpegs(args.synthetic) if args.synthetic else load_images(args.images)
+    if not images:
+        raise SystemExit(f'No images found in {args.images}; use --synthetic N')
+
+    server = None
+    if args.url:
+        base_url, server_pid = args.url.rstrip('/'), args.pid
+    else:
+        server = start_server(args.server, args.port)
+        base_url, server_pid = f'http://127.0.0.1:{args.port}', server.pid
+
+    levels = []
+    try:
+        wait_ready(base_url)
+        batch_size = args.batch_size if args.endpoint == 'predict_batch' else 1
+        for concurrency in args.concurrency:
+            result = run_level(base_url, args.endpoint, images, concurrency, args.duration,
+                               batch_size, not args.allow_cache_hits, server_pid)
+            levels.append(result)
+            print(f"c={concurrency:<4} {result['throughput_rps']:8.1f} req/s  p50={result['p50_ms']:.1f}ms "
+                  f"p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms errors={result['error_rate']:.1%}",
+                  file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'server': 'external' if args.url else args.server,
+            'endpoint': args.endpoint,
+            'batch_size': args.batch_size if args.endpoint == 'predict_batch' else 1,
+            'duration_s': args.duration,
+            'images': len(images),
+            'synthetic': bool(args.synthetic),
+            'cache_busting': not args.allow_cache_hits,
+        },
+        'levels': levels,
+    }
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+# Background model loading with readiness gating
+# ==============================================
+# Importing TensorFlow and building MobileNetV2 takes seconds, so the app starts
+# serving immediately and loads the model on a background thread. The first
+# start exports a SavedModel artifact; later starts load that artifact instead
+# of rebuilding the Keras graph and reading the weights file.
+
+import hashlib
+import os
+import threading
+import time
+import traceback
+
+import numpy as np
+
+
+CALIBRATION_LIMIT = 200  # Images used to calibrate int8 quantization
+
+
+def calibration_files(image_dir, limit=CALIBRATION_LIMIT):
+    """Image files in image_dir that int8 calibration uses (none if the directory is missing)."""
+    from imaging import IMAGE_EXTENSIONS
+
+    if not image_dir or not os.path.isdir(image_dir):
+        return []
+    names = sorted(n for n in os.listdir(image_dir) if os.path.splitext(n)[1].lower() in IMAGE_EXTENSIONS)
+    return [os.path.join(image_dir, n) for n in names[:limit]]
+
+
+def calibration_digest(paths):
+    """Short content hash of a calibration set, so each set gets its own cached int8 model."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:12]
+
+
+def tflite_path_for(artifact_dir, quantization='none', calibration_paths=None):
+    """
+    Default .tflite location next to a SavedModel artifact, e.g. model_cache/mobilenet_v2_dynamic.tflite.
+
+    int8 files also carry the calibration_digest of their calibration images
+    (model_cache/mobilenet_v2_int8_<digest>.tflite), so a model calibrated on
+    other images is never picked up from the cache.
+    """
+    suffix = '' if quantization == 'none' else f'_{quantization}'
+    if quantization == 'int8' and calibration_paths:
+        suffix += f'_{calibration_digest(calibration_paths)}'
+    return f'{artifact_dir.rstrip(os.sep)}{suffix}.tflite'
+
+
+def load_calibration_images(paths):
+    """Preprocessed images, used to calibrate int8 quantization."""
+    from imaging import load_image_file, preprocess_input
+
+    arrays = [load_image_file(path) for path in paths]
+    return preprocess_input(np.stack(arrays)) if arrays else None
+
+
+def export_artifacts(build_model, artifact_dir, tflite_path=None, quantization='none', calibration_dir=None,
+                     calibration_paths=None):
+    """
+    Create any missing serving artifacts: the SavedModel and, if requested, the
+    .tflite conversion plus a local copy of the ImageNet class index.
+
+    int8 is calibrated on calibration_paths if given, else on
+    calibration_files(calibration_dir). Imports TensorFlow; the pre-fork master
+    runs this in a subprocess.
+    """
+    import inference
+    from imagenet_labels import CLASS_INDEX_FILENAME
+
+    if not os.path.isdir(artifact_dir):
+        inference.export_inference(build_model(), artifact_dir)
+    if tflite_path is not None:
+        if not os.path.exists(tflite_path):
+            representative_data = None
+            if quantization == 'int8':
+                if calibration_paths is None:
+                    calibration_paths = calibration_files(calibration_dir)
+                representative_data = load_calibration_images(calibration_paths)
+            inference.export_tflite(artifact_dir, tflite_path, quantization, representative_data)
+        class_index_path = os.path.join(os.path.dirname(tflite_path), CLASS_INDEX_FILENAME)
+        if not os.path.exists(class_index_path):
+            inference.fetch_class_index(class_index_path)
+
+
+class ModelLoader:
+    """Loads a serving function in the background and records startup phases.
+
+    Args:
+        build_model (callable): Returns the Keras model; only called when no
+            artifact exists yet.
+        artifact_dir (str): Where the SavedModel artifact is stored.
+        input_shape (tuple): Per-image input shape.
+        warm_up_batch_sizes (tuple): Batch sizes run once before flipping ready.
+            The largest is also the TFLite backend's largest batch bucket.
+        jit_compile (bool): Compile the serving graph with XLA.
+        backend (str): 'tf' serves the SavedModel; 'tflite' serves
+            ``tflite_path`` through the TFLite interpreter without importing
+            TensorFlow (unless the file has to be exported first).
+        tflite_path (str): .tflite file used by the 'tflite' backend.
+        num_threads (int): Interpreter threads for the 'tflite' backend.
+        quantization (str): Quantization applied when the 'tflite' backend
+            has to export ``tflite_path`` (see inference.export_tflite).
+        calibration_dir (str): Images used to calibrate 'int8' quantization.
+    """
+
+    def __init__(self, build_model, artifact_dir, input_shape=(224, 224, 3),
+                 warm_up_batch_sizes=(1,), jit_compile=False, backend='tf',
+                 tflite_path=None, num_threads=None, quantization='none', calibration_dir=None):
+        if backend not in ('tf', 'tflite'):
+            raise ValueError(f'Unknown backend: {backend}')
+        self.build_model = build_model
+        self.artifact_dir = artifact_dir
+        self.input_shape = tuple(input_shape)
+        self.warm_up_batch_sizes = warm_up_batch_sizes
+        self.jit_compile = jit_compile
+        self.backend = backend
+        self.tflite_path = tflite_path
+        self.num_threads = num_threads
+        self.quantization = quantization
+        self.calibration_dir = calibration_dir
+
+        self.ready = threading.Event()
+        self.error = None
+        self.phases = {}  # phase name -> seconds, in the order they ran
+        self.infer = None
+        self.decoder = None  # imagenet_labels.ImageNetDecoder
+        self._created = time.perf_counter()
+
+    def start(self):
+        threading.Thread(target=self._load, name='model-loader', daemon=True).start()
+        return self
+
+    def _phase(self, name, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.phases[name] = time.perf_counter() - start
+        return result
+
+    def _load_tf(self):
+        from imagenet_labels import CLASS_INDEX_FILENAME, ImageNetDecoder
+
+        def import_tensorflow():
+            import inference
+            return inference
+
+        inference = self._phase('import_tensorflow', import_tensorflow)
+        if not os.path.isdir(self.artifact_dir):
+            model = self._phase('build_model', self.build_model)
+            self._phase('export_artifact', lambda: inference.export_inference(
+                model, self.artifact_dir, self.input_shape, self.jit_compile))
+        class_index_path = os.path.join(os.path.dirname(self.artifact_dir.rstrip(os.sep)), CLASS_INDEX_FILENAME)
+        if not os.path.exists(class_index_path):
+            inference.fetch_class_index(class_index_path)
+        infer = self._phase('load_artifact', lambda: inference.load_inference(self.artifact_dir))
+        return infer, ImageNetDecoder(class_index_path)
+
+    def _load_tflite(self):
+        from imagenet_labels import CLASS_INDEX_FILENAME, ImageNetDecoder
+
+        class_index_path = os.path.join(os.path.dirname(self.tflite_path), CLASS_INDEX_FILENAME)
+        if not (os.path.exists(self.tflite_path) and os.path.exists(class_index_path)):
+            self._phase('export_artifact', lambda: export_artifacts(
+                self.build_model, self.artifact_dir, self.tflite_path, self.quantization, self.calibration_dir))
+
+        def import_runtime():
+            from tflite_backend import TFLiteInference
+            return TFLiteInference, ImageNetDecoder(class_index_path)
+
+        TFLiteInference, decoder = self._phase('import_runtime', import_runtime)
+        infer = self._phase('load_artifact', lambda: TFLiteInference(
+            self.tflite_path, self.num_threads, max_batch_size=max(self.warm_up_batch_sizes)))
+        return infer, decoder
+
+    def _load(self):
+        try:
+            if self.backend == 'tflite':
+                infer, decoder = self._load_tflite()
+            else:
+                infer, decoder = self._load_tf()
+
+            def warm_up():
+                for batch_size in self.warm_up_batch_sizes:
+                    infer(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+                decoder.top_k(np.zeros((1, 1000), dtype=np.float32), 1)
+
+            self._phase('warm_up', warm_up)
+            self.infer = infer
+            self.decoder = decoder
+            self.phases['total'] = time.perf_counter() - self._created
+            self.ready.set()
+            print('Model ready: ' + ', '.join(f'{k}={v:.2f}s' for k, v in self.phases.items()))
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+            traceback.print_exc()
+
+    def status(self):
+        """Readiness and startup phase timings, for the /ready endpoint."""
+        return {
+            'ready': self.ready.is_set(),
+            'backend': self.backend,
+            'quantization': self.quantization if self.backend == 'tflite' else 'none',
+            'error': self.error,
+            'startup_seconds': dict(self.phases),
+        }
@@ -0,0 +1,100 @@
+# Pre-fork serving helpers: artifact export and worker scaling report
+# ===================================================================
+# Usage:
+#   python prefork.py export
+#       Build the SavedModel, .tflite and class index under model_cache/
+#       (gunicorn.conf.py runs this automatically before forking).
+#
+#   python prefork.py report --workers 1 2 4 8 --image uploads/images.jpeg
+#       Start gunicorn with each worker count, drive /predict, and report
+#       throughput plus per-worker RSS / PSS / private memory as JSON.
+#
+# PSS (proportional set size) splits shared pages between the processes mapping
+# them, so it is the number that shows the shared weights paying off; RSS counts
+# the shared model file in full for every worker.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from loadtest import child_pids, memory_stats, run_level, wait_ready
+from model_loader import calibration_files, export_artifacts, tflite_path_for
+
+# Same settings and defaults as app.py
+MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR', os.path.join('model_cache', 'mobilenet_v2'))
+MODEL_QUANTIZATION = os.environ.get('MODEL_QUANTIZATION', 'none')
+QUANT_CALIBRATION_DIR = os.environ.get('QUANT_CALIBRATION_DIR', 'uploads')
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH') or tflite_path_for(
+    MODEL_ARTIFACT_DIR, MODEL_QUANTIZATION, calibration_files(QUANT_CALIBRATION_DIR))
+
+
+def build_model():
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    return MobileNetV2(weights='imagenet')
+
+
+def run_report(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(args.image, 'rb') as f:
+        images = [f.read()]
+
+    results = []
+    for workers in args.workers:
+        base_url = f'http://127.0.0.1:{args.port}'
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+             '--workers', str(workers), '--bind', f'127.0.0.1:{args.port}', 'app:app'],
+            cwd=here,
+        )
+        try:
+            # Requests land on arbitrary workers, so wait for a run of successes
+            # long enough that every worker has most likely answered.
+            wait_ready(base_url, streak_needed=4 * workers)
+            load = run_level(base_url, 'predict', images, args.concurrency or 2 * workers, args.duration)
+            per_worker = [memory_stats(pid) for pid in child_pids(server.pid)]
+        finally:
+            server.terminate()
+            server.wait()
+
+        n = max(len(per_worker), 1)
+        result = {'workers': workers, 'throughput_rps': load['throughput_rps'], 'requests': load['requests'],
+                  'errors': load['errors'], 'p50_ms': load['p50_ms'], 'p99_ms': load['p99_ms']}
+        for key in ('rss_mb', 'pss_mb', 'private_mb'):
+            result[f'mean_{key}'] = sum(m[key] for m in per_worker) / n
+        result['total_pss_mb'] = sum(m['pss_mb'] for m in per_worker)
+        results.append(result)
+        print(f"workers={workers} throughput={load['throughput_rps']:.1f} req/s "
+              f"errors={load['errors']} rss={result['mean_rss_mb']:.0f}MB "
+              f"pss={result['mean_pss_mb']:.0f}MB private={result['mean_private_mb']:.0f}MB per worker")
+
+    report = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork serving helpers')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('export', help='Create the model_cache/ artifacts used by the workers')
+    report = sub.add_parser('report', help='Measure throughput and memory per worker count')
+    report.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    report.add_argument('--image', default=os.path.join('uploads', 'images.jpeg'))
+    report.add_argument('--duration', type=float, default=20)
+    report.add_argument('--concurrency', type=int, help='Client threads (default: 2 per worker)')
+    report.add_argument('--port', type=int, default=8765)
+    report.add_argument('--json', help='Write the report to this file instead of stdout')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_artifacts(build_model, MODEL_ARTIFACT_DIR, TFLITE_MODEL_PATH, MODEL_QUANTIZATION, QUANT_CALIBRATION_DIR)
+    else:
+        run_report(args)
+
+
+if __name__ == '__main__':
+    main()
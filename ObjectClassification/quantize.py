@@ -0,0 +1,141 @@
+# Quantized backend accuracy-vs-speed report
+# ==========================================
+# Converts MobileNetV2 to each TFLite quantization mode and compares it with the
+# float SavedModel on a local image set: top-1 agreement, top-5 agreement (float
+# top-1 within the quantized top-5), single-image latency and file size. Images
+# used to calibrate int8 are never scored: they come from --calibration-dir, or
+# every 4th image of --images is held out for them.
+#
+# Usage:
+#   python quantize.py report --images uploads/
+#   python quantize.py report --images /data/sample --modes dynamic int8 --json quant.json
+#   python quantize.py export --mode int8 --calibration-dir /data/sample
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from imaging import IMAGE_EXTENSIONS, load_image_file, preprocess_input
+from inference import QUANTIZATIONS, load_inference
+from model_loader import CALIBRATION_LIMIT, calibration_files, export_artifacts, tflite_path_for
+from prefork import MODEL_ARTIFACT_DIR, build_model
+from tflite_backend import TFLiteInference
+
+
+def split_image_set(image_dir, calibration_dir=None, hold_out_every=4):
+    """
+    (evaluation paths, calibration paths) with no image in both.
+
+    Calibration images come from calibration_dir when it is a different
+    directory; otherwise every hold_out_every-th image of image_dir is set aside
+    (none with hold_out_every=0).
+    """
+    names = sorted(n for n in os.listdir(image_dir) if os.path.splitext(n)[1].lower() in IMAGE_EXTENSIONS)
+    paths = [os.path.join(image_dir, n) for n in names]
+    if calibration_dir and os.path.realpath(calibration_dir) != os.path.realpath(image_dir):
+        calibration = calibration_files(calibration_dir)
+    elif hold_out_every:
+        calibration = paths[::hold_out_every][:CALIBRATION_LIMIT]
+    else:
+        calibration = []
+    held_out = {os.path.realpath(p) for p in calibration}
+    evaluation = [p for p in paths if os.path.realpath(p) not in held_out]
+    if not evaluation:
+        raise SystemExit(f'No evaluation images left in {image_dir}')
+    return evaluation, calibration
+
+
+def load_images(paths):
+    return preprocess_input(np.stack([load_image_file(path) for path in paths]))
+
+
+def predict_one_by_one(infer, images):
+    """Predictions and per-image latencies (ms) at batch size 1, as served by /predict."""
+    preds, latencies = [], []
+    for x in images:
+        start = time.perf_counter()
+        preds.append(infer(x[np.newaxis])[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.stack(preds), np.array(latencies)
+
+
+def summarize(name, preds, latencies, reference_top1, size_bytes):
+    top1 = preds.argmax(axis=1)
+    top5 = np.argsort(preds, axis=1)[:, -5:]
+    return {
+        'mode': name,
+        'top1_agreement': float((top1 == reference_top1).mean()),
+        'top5_agreement': float((top5 == reference_top1[:, np.newaxis]).any(axis=1).mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'size_mb': size_bytes / (1024 * 1024),
+    }
+
+
+def run_report(args):
+    # Only int8 needs calibration images; otherwise score every image
+    paths, calibration = split_image_set(args.images, args.calibration_dir,
+                                         hold_out_every=4 if 'int8' in args.modes else 0)
+    images = load_images(paths)
+    export_artifacts(build_model, MODEL_ARTIFACT_DIR)
+
+    reference = load_inference(MODEL_ARTIFACT_DIR)
+    reference(images[:1])  # Warm-up
+    ref_preds, ref_latencies = predict_one_by_one(reference, images)
+    ref_top1 = ref_preds.argmax(axis=1)
+    artifact_size = sum(os.path.getsize(os.path.join(root, f))
+                        for root, _, files in os.walk(MODEL_ARTIFACT_DIR) for f in files)
+    results = [summarize('float (tf)', ref_preds, ref_latencies, ref_top1, artifact_size)]
+
+    for mode in args.modes:
+        path = tflite_path_for(MODEL_ARTIFACT_DIR, mode, calibration)
+        export_artifacts(build_model, MODEL_ARTIFACT_DIR, path, mode, calibration_paths=calibration)
+        infer = TFLiteInference(path, num_threads=args.threads)
+        infer(images[:1])
+        preds, latencies = predict_one_by_one(infer, images)
+        results.append(summarize(f'tflite {mode}', preds, latencies, ref_top1, os.path.getsize(path)))
+
+    print(f'{len(paths)} images from {args.images}' +
+          (f' ({len(calibration)} others used for int8 calibration)' if 'int8' in args.modes else ''))
+    print(f"{'mode':<16}{'top-1 agree':>12}{'top-5 agree':>12}{'p50 ms':>9}{'p99 ms':>9}{'size MB':>9}")
+    print('-' * 67)
+    for r in results:
+        print(f"{r['mode']:<16}{r['top1_agreement']:>12.1%}{r['top5_agreement']:>12.1%}"
+              f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['size_mb']:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'images': len(paths), 'calibration_images': len(calibration) if 'int8' in args.modes else 0,
+                       'results': results}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantized TFLite backend for MobileNetV2')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help='Write model_cache/mobilenet_v2_<mode>.tflite (int8: _int8_<calibration hash>)')
+    export.add_argument('--mode', choices=QUANTIZATIONS, default='dynamic')
+    export.add_argument('--calibration-dir', default='uploads', help='Images used to calibrate int8')
+
+    report = sub.add_parser('report', help='Compare quantized models with the float model')
+    report.add_argument('--images', default='uploads', help='Directory of evaluation images')
+    report.add_argument('--modes', nargs='+', choices=QUANTIZATIONS, default=list(QUANTIZATIONS))
+    report.add_argument('--calibration-dir',
+                        help='Images used to calibrate int8 (default: every 4th image of --images, not scored)')
+    report.add_argument('--threads', type=int, help='TFLite interpreter threads')
+    report.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        calibration = calibration_files(args.calibration_dir)
+        export_artifacts(build_model, MODEL_ARTIFACT_DIR, tflite_path_for(MODEL_ARTIFACT_DIR, args.mode, calibration),
+                         args.mode, calibration_paths=calibration)
+    else:
+        run_report(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# Content-addressed upload store
+# ==============================
+# Uploads are stored once per distinct content under their SHA-256 digest,
+# sharded two directory levels deep (uploads/ab/cd/abcd...jpeg) so no directory
+# grows huge. Writes go to a temp file that is renamed into place, so
+# concurrent uploads never see partial files or overwrite each other. Past the
+# byte budget, the least recently used files are evicted.
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class UploadStore:
+    """Deduplicating, size-bounded store for uploaded images.
+
+    Args:
+        root (str): Directory holding the shard directories.
+        max_bytes (int): Total size kept on disk before LRU eviction.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._files = OrderedDict()  # digest -> (path, size), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats_counts = {'hits': 0, 'writes': 0, 'evictions': 0}
+        self._scan()
+
+    def _scan(self):
+        # Rebuild the index from disk, oldest mtime first (hits refresh mtime).
+        found = []
+        for level1 in _subdirs(self.root):
+            for level2 in _subdirs(level1):
+                for entry in os.scandir(level2):
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, os.path.splitext(entry.name)[0], entry.path, stat.st_size))
+        for _, digest, path, size in sorted(found):
+            self._files[digest] = (path, size)
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _path_for(self, digest, ext):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + ext)
+
+    def put(self, data, filename=''):
+        """
+        Store upload bytes unless identical content is already stored.
+
+        Args:
+            data (bytes): Raw upload
+            filename (str): Original name; only its extension is kept
+
+        Returns:
+            str: Path of the stored file
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._files.get(digest)
+            if entry is not None and os.path.exists(entry[0]):
+                self._files.move_to_end(digest)
+                self.stats_counts['hits'] += 1
+                os.utime(entry[0])  # Keeps LRU order across restarts
+                return entry[0]
+
+        ext = os.path.splitext(filename)[1].lower()
+        if not ext[1:].isalnum() or len(ext) > 6:
+            ext = ''  # Client-supplied; never let it shape the path
+        path = self._path_for(digest, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if digest not in self._files:
+                self._bytes += len(data)
+            self._files[digest] = (path, len(data))
+            self._files.move_to_end(digest)
+            self.stats_counts['writes'] += 1
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            _, (path, size) = self._files.popitem(last=False)
+            self._bytes -= size
+            self.stats_counts['evictions'] += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Disk usage and dedup hit rate, for the /upload_stats endpoint."""
+        with self._lock:
+            stats = dict(self.stats_counts)
+            stats['files'] = len(self._files)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        puts = stats['hits'] + stats['writes']
+        stats['hit_rate'] = stats['hits'] / puts if puts else 0.0
+        return stats
+
+
+def _subdirs(path):
+    if not os.path.isdir(path):
+        return []
+    return [entry.path for entry in os.scandir(path) if entry.is_dir() and len(entry.name) == 2]
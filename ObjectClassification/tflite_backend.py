@@ -0,0 +1,91 @@
+# TFLite inference backend
+# ========================
+# Serves a converted .tflite model through the lightweight interpreter. The
+# model file is memory-mapped and, with TFLite's builtin kernels, constant
+# weights are read straight from that mapping, so every worker process on the
+# box shares one page-cache copy of the weights.
+#
+# Uses the standalone tflite_runtime package when installed, otherwise the
+# interpreter bundled with TensorFlow.
+
+import threading
+
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter, OpResolverType
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+    OpResolverType = tf.lite.experimental.OpResolverType
+
+
+def bucket_sizes(max_batch_size):
+    """Powers of two below max_batch_size, then max_batch_size itself."""
+    sizes, size = [], 1
+    while size < max_batch_size:
+        sizes.append(size)
+        size *= 2
+    return tuple(sizes) + (max_batch_size,)
+
+
+class TFLiteInference:
+    """Callable mapping a float32 (N, H, W, C) batch to (N, classes) predictions.
+
+    Resizing an interpreter re-allocates all of its tensors, so instead of
+    following every batch size the micro-batcher produces, batches are padded
+    up to a fixed bucket size, each served by its own interpreter that is
+    allocated once. Batches above max_batch_size run in max_batch_size chunks.
+
+    Args:
+        model_path (str): Path of the .tflite file
+        num_threads (int): Interpreter threads; 1 suits one worker per core
+        share_weights (bool): Skip the default XNNPACK delegate, which repacks
+            weights into private memory, so the mmapped weights stay shared
+            (also across the per-bucket interpreters)
+        max_batch_size (int): Largest bucket; see bucket_sizes()
+    """
+
+    def __init__(self, model_path, num_threads=None, share_weights=True, max_batch_size=32):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.resolver = (OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES if share_weights
+                         else OpResolverType.AUTO)
+        self.buckets = bucket_sizes(max(1, int(max_batch_size)))
+        self._interpreters = {}  # bucket size -> (interpreter, input index, output index, lock)
+        self._lock = threading.Lock()
+
+    def _interpreter(self, batch_size, sample_shape):
+        # Created on first use, so unused buckets cost nothing
+        with self._lock:
+            entry = self._interpreters.get(batch_size)
+            if entry is None:
+                interpreter = Interpreter(model_path=self.model_path, num_threads=self.num_threads,
+                                          experimental_op_resolver_type=self.resolver)
+                input_index = interpreter.get_input_details()[0]['index']
+                interpreter.resize_tensor_input(input_index, (batch_size,) + sample_shape)
+                interpreter.allocate_tensors()
+                entry = (interpreter, input_index, interpreter.get_output_details()[0]['index'],
+                         threading.Lock())  # An interpreter is not thread-safe
+                self._interpreters[batch_size] = entry
+            return entry
+
+    def _run(self, x):
+        n = len(x)
+        bucket = next(size for size in self.buckets if size >= n)
+        if bucket != n:
+            padded = np.zeros((bucket,) + x.shape[1:], dtype=np.float32)
+            padded[:n] = x
+            x = padded
+        interpreter, input_index, output_index, lock = self._interpreter(bucket, x.shape[1:])
+        with lock:
+            interpreter.set_tensor(input_index, x)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index)[:n]
+
+    def __call__(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        largest = self.buckets[-1]
+        if len(x) <= largest:
+            return self._run(x)
+        return np.concatenate([self._run(x[i:i + largest]) for i in range(0, len(x), largest)])
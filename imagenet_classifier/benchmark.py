@@ -0,0 +1,195 @@
+"""
+CPU inference benchmark across models, batch sizes, thread settings and backends.
+
+Each (model, backend, intra-op, inter-op) combination runs in a fresh
+subprocess, because TensorFlow's thread pools can only be configured before
+the runtime starts. Results go to a JSON report with the machine and software
+versions, so reports from different runs or nodes can be compared directly.
+
+Usage:
+    python benchmark.py                                   # resnet50 + mobilenet_v2, defaults below
+    python benchmark.py --models resnet50 --batch-sizes 1 32 --intra-op 1 4 8
+    python benchmark.py --backends compiled tflite:dynamic --json results/bench.json
+    python benchmark.py --baseline results/bench.json     # print speedups against an earlier report
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKENDS = ('keras', 'compiled', 'tflite:none', 'tflite:dynamic', 'tflite:float16', 'tflite:int8')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark CPU inference throughput and latency')
+    parser.add_argument('--models', nargs='+', default=['resnet50', 'mobilenet_v2'])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['keras', 'compiled', 'tflite:dynamic'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--intra-op', type=int, nargs='+', default=[0],
+                        help='Intra-op thread counts to try (0 = TensorFlow default)')
+    parser.add_argument('--inter-op', type=int, nargs='+', default=[0],
+                        help='Inter-op thread counts to try (0 = TensorFlow default; ignored by tflite)')
+    parser.add_argument('--inputs', nargs='+', choices=['image', 'synthetic'], default=['image', 'synthetic'],
+                        help="'image' repeats --image across the batch; 'synthetic' is random pixels")
+    parser.add_argument('--image', default='data/test.jpg')
+    parser.add_argument('--calibration-dir', default='data', help='Images used to calibrate tflite:int8')
+    parser.add_argument('--runs', type=int, default=30, help='Timed calls per batch size')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed calls per batch size')
+    parser.add_argument('--json', default='benchmark_report.json', help='Where to write the report')
+    parser.add_argument('--baseline', help='Earlier report to compare images/sec against')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# -- Worker: one configuration in its own process -----------------------------
+
+def run_worker(config):
+    import tensorflow as tf
+
+    # Must happen before any op runs
+    tf.config.threading.set_intra_op_parallelism_threads(config['intra_op'])
+    tf.config.threading.set_inter_op_parallelism_threads(config['inter_op'])
+
+    from model import get_model
+    from utils.image_utils import load_and_preprocess_image
+    from utils.inference import compile_inference
+    from utils.quantization import load_calibration_data, load_tflite_model
+
+    entry = get_model(config['model'])
+    input_shape = entry.input_size + (3,)
+
+    def load_image(path):
+        return load_and_preprocess_image(path, entry.input_size, entry.preprocess_input)
+
+    backend = config['backend']
+    if backend == 'keras':
+        infer = lambda x: entry.model.predict(x, verbose=0)
+    elif backend == 'compiled':
+        infer = compile_inference(entry.model, input_shape)
+    else:
+        quantization = backend.split(':', 1)[1]
+        calibration = load_calibration_data(config['calibration_dir'], load_image) if quantization == 'int8' else None
+        infer = load_tflite_model(entry.model, config['model'], quantization, calibration,
+                                  num_threads=config['intra_op'] or None)
+
+    rng = np.random.default_rng(0)
+    results = []
+    for kind, batch_size in itertools.product(config['inputs'], config['batch_sizes']):
+        if kind == 'image':
+            x = np.repeat(load_image(config['image']), batch_size, axis=0)
+        else:
+            pixels = rng.integers(0, 256, size=(batch_size,) + input_shape).astype(np.float32)
+            x = entry.preprocess_input(pixels)
+        for _ in range(config['warmup']):
+            infer(x)
+        latencies = []
+        for _ in range(config['runs']):
+            start = time.perf_counter()
+            infer(x)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies)
+        results.append({
+            'model': config['model'],
+            'backend': backend,
+            'intra_op': config['intra_op'],
+            'inter_op': config['inter_op'],
+            'input': kind,
+            'batch_size': batch_size,
+            'images_per_second': float(batch_size * len(latencies) / latencies.sum()),
+            'p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'p90_ms': float(np.percentile(latencies, 90) * 1000),
+            'p99_ms': float(np.percentile(latencies, 99) * 1000),
+            'mean_ms': float(latencies.mean() * 1000),
+        })
+    print(json.dumps({'tensorflow': tf.__version__, 'results': results}))
+
+
+# -- Driver --------------------------------------------------------------------
+
+def result_key(r):
+    return (r['model'], r['backend'], r['intra_op'], r['inter_op'], r['input'], r['batch_size'])
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    configs = []
+    for model_name, backend, intra_op in itertools.product(args.models, args.backends, args.intra_op):
+        # The TFLite interpreter has a single thread pool; inter-op does not apply
+        inter_ops = args.inter_op[:1] if backend.startswith('tflite') else args.inter_op
+        for inter_op in inter_ops:
+            configs.append({
+                'model': model_name, 'backend': backend, 'intra_op': intra_op, 'inter_op': inter_op,
+                'batch_sizes': args.batch_sizes, 'inputs': args.inputs, 'image': args.image,
+                'calibration_dir': args.calibration_dir, 'runs': args.runs, 'warmup': args.warmup,
+            })
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results, failures, tf_version = [], [], None
+    for config in configs:
+        label = f"{config['model']} {config['backend']} intra={config['intra_op']} inter={config['inter_op']}"
+        print(f"Running {label}...", file=sys.stderr)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(config)],
+                              cwd=here, capture_output=True, text=True)
+        if proc.returncode != 0:
+            failures.append({'config': label, 'error': proc.stderr.strip().splitlines()[-1:]})
+            print(f"  failed: {proc.stderr.strip().splitlines()[-1:]}", file=sys.stderr)
+            continue
+        output = json.loads(proc.stdout.strip().splitlines()[-1])
+        tf_version = output['tensorflow']
+        results.extend(output['results'])
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'tensorflow': tf_version,
+            'runs': args.runs,
+            'warmup': args.warmup,
+        },
+        'results': results,
+        'failures': failures,
+    }
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result_key(r): r for r in json.load(f)['results']}
+
+    print(f"{'model':<14}{'backend':<16}{'intra':>6}{'inter':>6}{'input':>10}{'batch':>6}"
+          f"{'img/s':>9}{'p50 ms':>9}{'p99 ms':>9}" + (f"{'vs base':>9}" if baseline else ''))
+    for r in results:
+        line = (f"{r['model']:<14}{r['backend']:<16}{r['intra_op']:>6}{r['inter_op']:>6}{r['input']:>10}"
+                f"{r['batch_size']:>6}{r['images_per_second']:>9.1f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+        base = baseline.get(result_key(r))
+        if base:
+            line += f"{r['images_per_second'] / base['images_per_second']:>8.2f}x"
+        print(line)
+    print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,151 @@
+import argparse
 import os
-from tensorflow.keras.applications.resnet50 import ResNet50, decode_predictions
+import numpy as np
+from model import available_models, get_model
+from utils.batch_classify import classify_directory
+from utils.decoding import ImageNetDecoder
+from utils.embeddings import embedding_model, extract_embeddings, load_embeddings, search
 from utils.image_utils import load_and_preprocess_image
+from utils.inference import compile_inference
+from utils.quantization import QUANTIZATIONS, load_calibration_data, load_tflite_model, quantization_report
+from utils.tensor_cache import TensorCache
+from utils.video import VideoSampler, classify_video
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Classify an image with a pre-trained ImageNet model')
+    parser.add_argument('--image', '-i', default='data/test.jpg', help='Path to input image')
+    parser.add_argument('--model', '-m', choices=available_models(), default='resnet50', help='Model to use')
+    parser.add_argument('--top-k', '-k', type=int, default=3, help='Number of top predictions to show')
+    parser.add_argument('--min-prob', type=float, help='Drop predictions below this probability')
+    parser.add_argument('--backend', choices=['keras', 'tflite'], default='keras',
+                        help='Serve the float Keras model or a TFLite conversion')
+    parser.add_argument('--quantization', choices=QUANTIZATIONS, default='dynamic',
+                        help='Quantization used by the tflite backend')
+    parser.add_argument('--calibration-dir', default='data',
+                        help='Images used to calibrate int8 quantization')
+    parser.add_argument('--dir', '-d', help='Classify every image under this directory instead of --image')
+    parser.add_argument('--output', '-o', default='predictions.csv',
+                        help='Results file for --dir (.csv, or .jsonl for JSON lines)')
+    parser.add_argument('--batch-size', type=int, default=64, help='Images per inference batch for --dir')
+    parser.add_argument('--workers', type=int, help='Decode threads for --dir (default: CPU count)')
+    parser.add_argument('--tensor-cache', metavar='DIR',
+                        help='Keep decoded, resized images in DIR so repeat runs skip JPEG decoding')
+    parser.add_argument('--video', '-v', help='Classify sampled frames of this video file instead of --image')
+    parser.add_argument('--every', type=float,
+                        help='Seconds between candidate video frames (default: 1, or 0.2 with --scene-change)')
+    parser.add_argument('--min-change', type=float,
+                        help='Skip frames differing less than this (0-1) from the last kept frame '
+                             '(default: 0.02, or 0.15 with --scene-change)')
+    parser.add_argument('--scene-change', action='store_true',
+                        help='Sample densely but keep only frames that start a new scene')
+    parser.add_argument('--embed', metavar='DIR',
+                        help='Extract pooled features of every image under DIR into --embeddings and exit')
+    parser.add_argument('--similar', metavar='IMAGE', nargs='+',
+                        help='List the --top-k images in --embeddings most similar to each IMAGE and exit')
+    parser.add_argument('--embeddings', default='embeddings.npy', help='Embedding matrix for --embed/--similar')
+    parser.add_argument('--embedding-dtype', choices=['float16', 'float32'], default='float32',
+                        help='Storage precision of --embed (float16 halves the file, not search memory)')
+    parser.add_argument('--quantization-report', metavar='DIR',
+                        help='Compare each quantization with the float model on the images in DIR and exit')
+    return parser.parse_args()
 
 def main():
-    # Load ResNet50 pretrained on ImageNet
-    model = ResNet50(weights='imagenet')
+    args = parse_args()
+
+    # Load the pretrained model once; the registry reuses it for later calls in this process
+    print(f"Loading {args.model} model...")
+    entry = get_model(args.model)
+    model = entry.model
+    input_shape = entry.input_size + (3,)
+
+    cache = TensorCache(args.tensor_cache, entry.input_size) if args.tensor_cache else None
+
+    def load_image(path):
+        return load_and_preprocess_image(path, entry.input_size, entry.preprocess_input, cache)
+
+    if args.embed or args.similar:
+        embed = compile_inference(embedding_model(model), input_shape)
+        if args.embed:
+            stats = extract_embeddings(
+                embed, args.embed, args.embeddings, batch_size=args.batch_size, workers=args.workers,
+                dtype=args.embedding_dtype, target_size=entry.input_size, preprocess=entry.preprocess_input,
+                cache=cache)
+            print(f"Embedded {stats['images']} images ({stats['failures']} failed, {stats['dim']}-d) "
+                  f"in {stats['seconds']:.1f}s -> {args.embeddings}")
+        else:
+            matrix, paths = load_embeddings(args.embeddings)
+            # All query images go through the model and the search together
+            queries = embed(np.concatenate([load_image(path) for path in args.similar]))
+            indices, scores = search(matrix, queries, top_k=args.top_k)
+            for query, row_indices, row_scores in zip(args.similar, indices, scores):
+                print(f"Most similar to {query}:")
+                for i, score in zip(row_indices, row_scores):
+                    print(f"{score:.4f}  {paths[i]}")
+            if cache is not None:
+                cache.flush()
+        return
+
+    if args.quantization_report:
+        results = quantization_report(model, args.model, args.quantization_report, load_image,
+                                      calibration_dir=args.calibration_dir)
+        if cache is not None:
+            cache.flush()
+        print(f"{'mode':<16}{'top-1 agree':>12}{'top-5 agree':>12}{'p50 ms':>9}{'size MB':>9}")
+        for r in results:
+            print(f"{r['mode']:<16}{r['top1_agreement']:>12.1%}{r['top5_agreement']:>12.1%}"
+                  f"{r['p50_ms']:>9.2f}{r['size_mb']:>9.1f}")
+        return
+
+    if args.backend == 'tflite':
+        calibration = None
+        if args.quantization == 'int8':
+            calibration = load_calibration_data(args.calibration_dir, load_image)
+            if cache is not None:
+                cache.flush()
+        infer = load_tflite_model(model, args.model, args.quantization, calibration)
+    else:
+        infer = compile_inference(model, input_shape)  # Traced once; avoids model.predict overhead
+
+    decoder = ImageNetDecoder()
+
+    if args.video:
+        every = args.every if args.every is not None else (0.2 if args.scene_change else 1.0)
+        min_change = args.min_change if args.min_change is not None else (0.15 if args.scene_change else 0.02)
+        sampler = VideoSampler(args.video, entry.input_size, every, min_change)
+        for segment in classify_video(infer, decoder, sampler, entry.preprocess_input,
+                                      batch_size=args.batch_size, top_k=args.top_k, min_prob=args.min_prob):
+            labels = ', '.join(f"{p['label']} {p['probability']*100:.1f}%" for p in segment['predictions'])
+            print(f"{segment['start']:8.2f}s - {segment['end']:8.2f}s  ({segment['frames']} frames)  {labels}",
+                  flush=True)
+        print(f"Classified {sampler.candidates - sampler.skipped} of {sampler.candidates} sampled frames "
+              f"({sampler.skipped} near-duplicates skipped)")
+        return
+
+    if args.dir:
+        stats = classify_directory(infer, decoder, args.dir, args.output, top_k=args.top_k,
+                                   batch_size=args.batch_size, workers=args.workers,
+                                   target_size=entry.input_size, preprocess=entry.preprocess_input,
+                                   cache=cache, min_prob=args.min_prob)
+        print(f"Classified {stats['images']} images ({stats['failures']} failed) in {stats['seconds']:.1f}s "
+              f"- {stats['images_per_second']:.1f} images/sec")
+        print(f"Results written to {args.output}")
+        return
 
     # Load and preprocess image
-    img_path = 'data/test.jpg'  # <-- Make sure image exists
+    img_path = args.image  # <-- Make sure image exists
     if not os.path.exists(img_path):
         print(f"Image not found: {img_path}")
         return
 
-    x = load_and_preprocess_image(img_path)
+    x = load_image(img_path)
+    if cache is not None:
+        cache.flush()
 
     # Predict
-    preds = model.predict(x)
+    preds = infer(x)
 
-    # Decode top 3 predictions
-    results = decode_predictions(preds, top=3)[0]
+    # Decode top predictions
+    results = decoder.top_k(preds, args.top_k, args.min_prob).rows()[0]
     print("Predictions:")
     for (_, label, prob) in results:
         print(f"{label}: {prob*100:.2f}%")
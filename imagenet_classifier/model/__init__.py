@@ -1 +1,74 @@
-# Optional init file for model package
+"""
+Shared registry of pre-trained ImageNet models.
+
+Each architecture is built at most once per process and reused by every caller,
+together with its matching preprocess_input / decode_predictions functions:
+
+    from model import get_model
+    entry = get_model('resnet50')
+    preds = entry.model(entry.preprocess_input(x))
+    print(entry.decode_predictions(preds.numpy(), top=3))
+"""
+
+import importlib
+import threading
+from collections import namedtuple
+
+# name -> (keras.applications module, constructor, input size)
+MODEL_SPECS = {
+    'resnet50': ('resnet50', 'ResNet50', (224, 224)),
+    'mobilenet_v2': ('mobilenet_v2', 'MobileNetV2', (224, 224)),
+    'vgg16': ('vgg16', 'VGG16', (224, 224)),
+    'inception_v3': ('inception_v3', 'InceptionV3', (299, 299)),
+    'efficientnet_b0': ('efficientnet', 'EfficientNetB0', (224, 224)),
+}
+
+LoadedModel = namedtuple('LoadedModel', ['name', 'model', 'preprocess_input', 'decode_predictions', 'input_size'])
+
+_models = {}
+_locks = {name: threading.Lock() for name in MODEL_SPECS}
+
+
+def available_models():
+    """Names accepted by get_model."""
+    return sorted(MODEL_SPECS)
+
+
+def _module(name):
+    if name not in MODEL_SPECS:
+        raise ValueError(f"Unknown model '{name}'. Available: {', '.join(available_models())}")
+    return importlib.import_module(f'tensorflow.keras.applications.{MODEL_SPECS[name][0]}')
+
+
+def get_preprocessing(name):
+    """(preprocess_input, decode_predictions, input_size) for a model, without building it."""
+    module = _module(name)
+    return module.preprocess_input, module.decode_predictions, MODEL_SPECS[name][2]
+
+
+def get_model(name):
+    """
+    Return the ImageNet-pretrained model registered as `name`, building it on first use.
+
+    Concurrent first calls build the model once; later calls return the cached
+    instance, so weights are never loaded twice in one process.
+
+    Returns:
+        LoadedModel: (name, model, preprocess_input, decode_predictions, input_size)
+    """
+    entry = _models.get(name)
+    if entry is not None:
+        return entry
+    module = _module(name)
+    with _locks[name]:
+        if name not in _models:
+            _, constructor, input_size = MODEL_SPECS[name]
+            model = getattr(module, constructor)(weights='imagenet')
+            _models[name] = LoadedModel(name, model, module.preprocess_input,
+                                        module.decode_predictions, input_size)
+    return _models[name]
+
+
+def loaded_models():
+    """Names of the models already built in this process."""
+    return sorted(_models)
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tensorflow.keras.applications.resnet50 import preprocess_input
+
+from utils.image_utils import load_and_preprocess_images
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp'}
+_DONE = object()
+
+
+def iter_image_paths(root):
+    """Yield image paths under root lazily, so huge trees start streaming at once."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+
+def prefetch_batches(paths, batch_size=64, target_size=(224, 224), workers=None, prefetch=4,
+                     preprocess=preprocess_input, cache=None):
+    """
+    Decode and preprocess images on a thread pool, a few batches ahead of the consumer.
+
+    Args:
+        paths (iterable): Image paths, consumed lazily
+        batch_size (int): Images per batch
+        target_size (tuple): (height, width) to resize to
+        workers (int): Decode threads (default: CPU count)
+        prefetch (int): Ready batches buffered ahead of inference
+        preprocess (callable): The model's preprocess_input (default: ResNet50)
+        cache (TensorCache): Optional on-disk cache of decoded pixels
+
+    Yields:
+        tuple: (ok_paths, x, failed) where x is the preprocessed
+        (len(ok_paths), H, W, 3) batch and failed is a list of (path, error)
+    """
+    ready = queue.Queue(maxsize=prefetch)
+
+    def produce():
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            batch = []
+            try:
+                for path in paths:
+                    batch.append(path)
+                    if len(batch) == batch_size:
+                        ready.put(_load_batch(pool, batch, target_size, preprocess, cache))
+                        batch = []
+                if batch:
+                    ready.put(_load_batch(pool, batch, target_size, preprocess, cache))
+            except Exception as e:
+                ready.put(e)
+            ready.put(_DONE)
+
+    threading.Thread(target=produce, name='image-prefetch', daemon=True).start()
+    while True:
+        item = ready.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _load_batch(pool, batch, target_size, preprocess, cache):
+    x, failed = load_and_preprocess_images(batch, target_size, executor=pool, preprocess=preprocess, cache=cache)
+    failed_paths = {path for path, _ in failed}
+    ok_paths = [path for path in batch if path not in failed_paths]
+    return ok_paths, x, failed
+
+
+class ResultWriter:
+    """Appends predictions to a CSV or JSONL file (chosen by extension), flushing per batch."""
+
+    def __init__(self, output_path, top_k):
+        self.top_k = top_k
+        self.jsonl = output_path.endswith(('.jsonl', '.ndjson'))
+        self._file = open(output_path, 'w', newline='', encoding='utf-8')
+        if not self.jsonl:
+            self._csv = csv.writer(self._file)
+            header = ['path', 'error']
+            for rank in range(1, top_k + 1):
+                header += [f'label_{rank}', f'prob_{rank}']
+            self._csv.writerow(header)
+
+    def write(self, path, predictions=None, error=None):
+        """predictions: list of (class_id, label, prob) tuples as from decode_predictions."""
+        if self.jsonl:
+            record = {'path': path}
+            if error is not None:
+                record['error'] = error
+            else:
+                record['predictions'] = [{'label': label, 'probability': float(prob)}
+                                         for _, label, prob in predictions]
+            self._file.write(json.dumps(record) + '\n')
+        else:
+            row = [path, error or '']
+            for _, label, prob in predictions or []:
+                row += [label, f'{prob:.6f}']
+            self._csv.writerow(row)
+
+    def write_batch(self, paths, top):
+        """Write one row per path from a batch decoded with ImageNetDecoder.top_k."""
+        labels, probs, mask = top.labels.tolist(), top.probabilities.tolist(), top.mask.tolist()
+        for path, row_labels, row_probs, row_mask in zip(paths, labels, probs, mask):
+            self.write(path, [(None, label, prob) for label, prob, keep in zip(row_labels, row_probs, row_mask)
+                              if keep])
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def classify_directory(infer, decoder, image_dir, output_path, top_k=5,
+                       batch_size=64, workers=None, report_every=10.0, target_size=(224, 224),
+                       preprocess=preprocess_input, cache=None, min_prob=None):
+    """
+    Classify every image under image_dir, writing results incrementally.
+
+    Decoding runs ahead on a thread pool while the previous batch is in the
+    model, so inference never waits on disk unless decode is the bottleneck.
+    Each batch's labels are picked in one decoder.top_k call (see
+    utils.decoding.ImageNetDecoder); predictions below min_prob are dropped.
+
+    Returns:
+        dict: images, failures, seconds and images_per_second for the run
+    """
+    writer = ResultWriter(output_path, top_k)
+    done = failures = 0
+    start = last_report = time.perf_counter()
+    try:
+        for ok_paths, x, failed in prefetch_batches(iter_image_paths(image_dir), batch_size, target_size,
+                                                     workers=workers, preprocess=preprocess, cache=cache):
+            if len(x):
+                writer.write_batch(ok_paths, decoder.top_k(infer(x), top_k, min_prob))
+            for path, error in failed:
+                writer.write(path, error=error)
+            writer.flush()
+            done += len(ok_paths)
+            failures += len(failed)
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"{done} images, {done / (now - start):.1f} images/sec")
+                last_report = now
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.flush()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'images': done,
+        'failures': failures,
+        'seconds': elapsed,
+        'images_per_second': done / elapsed if elapsed else 0.0,
+    }
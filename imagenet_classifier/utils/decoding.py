@@ -0,0 +1,68 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+import tensorflow as tf
+
+CLASS_INDEX_URL = 'https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json'
+
+# TopK and top_k are copied from ObjectClassification/imagenet_labels.py: the two
+# projects are installed and deployed separately and share no package. Keep the
+# copies in sync; only class index loading differs (this one may use Keras' cache).
+
+
+class TopK(namedtuple('TopK', ['indices', 'probabilities', 'labels', 'wnids', 'mask'])):
+    """Columnar top-k results; every field is an (N, k) array, best class first.
+
+    `mask` is False where a prediction fell below the decoder's threshold.
+    """
+
+    def rows(self):
+        """Per-image lists of (wnid, label, prob), as keras' decode_predictions returns."""
+        return [[(w, l, p) for w, l, p, keep in zip(wnids, labels, probs, mask) if keep]
+                for wnids, labels, probs, mask in zip(self.wnids, self.labels, self.probabilities, self.mask)]
+
+
+class ImageNetDecoder:
+    """
+    Batch replacement for keras' decode_predictions.
+
+    The class index is loaded once into label arrays, and top-k selection runs
+    over the whole (N, 1000) prediction matrix with argpartition, so only k
+    columns per row are ever sorted.
+
+    Args:
+        class_index_path (str): imagenet_class_index.json; fetched into the
+            Keras cache (like decode_predictions does) if not given
+    """
+
+    def __init__(self, class_index_path=None):
+        if class_index_path is None:
+            class_index_path = tf.keras.utils.get_file('imagenet_class_index.json', CLASS_INDEX_URL,
+                                                       cache_subdir='models')
+        with open(class_index_path) as f:
+            class_index = json.load(f)
+        self.wnids = np.array([class_index[str(i)][0] for i in range(len(class_index))])
+        self.labels = np.array([class_index[str(i)][1] for i in range(len(class_index))])
+
+    def top_k(self, preds, k=5, threshold=None):
+        """
+        Select the k most probable classes of every row at once.
+
+        Args:
+            preds (numpy.ndarray): (N, classes) probabilities
+            k (int): Classes kept per row
+            threshold (float): Optionally mask out predictions below this probability
+
+        Returns:
+            TopK: (N, k) indices, probabilities, labels, wnids and mask
+        """
+        preds = np.asarray(preds)
+        k = min(k, preds.shape[1])
+        indices = np.argpartition(preds, -k, axis=1)[:, -k:]
+        probs = np.take_along_axis(preds, indices, axis=1)
+        order = np.argsort(-probs, axis=1)  # Only k columns left to sort
+        indices = np.take_along_axis(indices, order, axis=1)
+        probs = np.take_along_axis(probs, order, axis=1)
+        mask = probs >= threshold if threshold else np.ones(probs.shape, dtype=bool)
+        return TopK(indices, probs, self.labels[indices], self.wnids[indices], mask)
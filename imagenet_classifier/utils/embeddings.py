@@ -0,0 +1,144 @@
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications.resnet50 import preprocess_input
+
+from utils.batch_classify import iter_image_paths, prefetch_batches
+
+
+def embedding_model(model):
+    """
+    Model that outputs the pooled features feeding the classifier head.
+
+    Shares layers (and weights) with `model`, so no extra weights are loaded.
+    For ResNet50 this is the 2048-d global average pool.
+    """
+    return tf.keras.Model(model.input, model.layers[-2].output)
+
+
+def paths_file(embeddings_path):
+    """Text file listing the image behind each embedding row, one per line."""
+    return os.path.splitext(embeddings_path)[0] + '.paths.txt'
+
+
+def _normalize(x):
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def extract_embeddings(infer, image_dir, output_path, batch_size=64, workers=None, dtype='float32',
+                       target_size=(224, 224), preprocess=preprocess_input, cache=None):
+    """
+    Embed every image under image_dir into one L2-normalised matrix on disk.
+
+    Rows are written straight into a memory-mapped .npy file as batches come
+    back from the model, so memory use does not grow with the corpus. Image
+    paths for each row go to paths_file(output_path).
+
+    Args:
+        infer (callable): Maps a preprocessed batch to (N, D) features
+        image_dir (str): Directory searched recursively for images
+        output_path (str): .npy file for the (N, D) matrix
+        dtype (str): 'float32', or 'float16' for half the size on disk
+            (upcast once by load_embeddings, at twice that size in memory)
+        target_size, preprocess, cache: As for prefetch_batches
+
+    Returns:
+        dict: images, failures, dim and seconds for the run
+    """
+    paths = list(iter_image_paths(image_dir))
+
+    start = time.perf_counter()
+    matrix = None
+    rows = failures = 0
+    with open(paths_file(output_path), 'w', encoding='utf-8') as names:
+        for ok_paths, x, failed in prefetch_batches(paths, batch_size, target_size, workers,
+                                                   preprocess=preprocess, cache=cache):
+            failures += len(failed)
+            if not len(x):
+                continue
+            features = _normalize(np.asarray(infer(x), dtype=np.float32).reshape(len(x), -1))
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype,
+                                                   shape=(len(paths), features.shape[1]))
+            matrix[rows:rows + len(features)] = features
+            rows += len(features)
+            names.writelines(path + '\n' for path in ok_paths)
+    if cache is not None:
+        cache.flush()
+
+    if matrix is None:
+        raise ValueError(f"No readable images found in {image_dir}")
+    matrix.flush()
+    if rows < len(paths):
+        # Failed images left unused rows at the end; rewrite without them
+        trimmed = np.lib.format.open_memmap(output_path + '.tmp', mode='w+', dtype=dtype,
+                                            shape=(rows, matrix.shape[1]))
+        trimmed[:] = matrix[:rows]
+        trimmed.flush()
+        del matrix, trimmed
+        os.replace(output_path + '.tmp', output_path)
+
+    return {'images': rows, 'failures': failures, 'dim': features.shape[1],
+            'seconds': time.perf_counter() - start}
+
+
+def load_embeddings(embeddings_path):
+    """
+    (embedding matrix, list of image paths) saved by extract_embeddings.
+
+    A float32 matrix stays memory-mapped. A float16 one is converted to float32
+    in memory here, once, rather than block by block on every search.
+    """
+    matrix = np.load(embeddings_path, mmap_mode='r')
+    if matrix.dtype != np.float32:
+        matrix = np.asarray(matrix, dtype=np.float32)
+    with open(paths_file(embeddings_path), encoding='utf-8') as f:
+        paths = f.read().splitlines()
+    return matrix, paths
+
+
+def search(embeddings, queries, top_k=5, block_size=8192):
+    """
+    Top-k cosine similarity of each query against an L2-normalised matrix.
+
+    The matrix is scanned in blocks of block_size rows: each block is one
+    (Q, D) x (D, B) product, its k best columns per query are picked with
+    argpartition and merged into the running top-k. Memory stays bounded by the
+    block, and no Python loop runs per row or per query: pass all queries at
+    once so the matrix is read a single time. A float32 matrix is used without
+    copying; anything else is converted per block (see load_embeddings).
+
+    Args:
+        embeddings (numpy.ndarray): (N, D) normalised rows, e.g. from load_embeddings
+        queries (numpy.ndarray): (D,) or (Q, D) query vectors, normalised here
+        top_k (int): Neighbours to return per query
+        block_size (int): Rows of the matrix scored at once
+
+    Returns:
+        tuple: (indices, scores), both (Q, k), best match first
+    """
+    queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+    k = min(top_k, len(embeddings))
+    best_idx = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+    for start in range(0, len(embeddings), block_size):
+        block = np.asarray(embeddings[start:start + block_size], dtype=np.float32)
+        scores = queries @ block.T
+        if scores.shape[1] > k:
+            cols = np.argpartition(scores, -k, axis=1)[:, -k:]
+            scores = np.take_along_axis(scores, cols, axis=1)
+        else:
+            cols = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        best_idx = np.concatenate([best_idx, cols + start], axis=1)
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+            best_idx = np.take_along_axis(best_idx, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
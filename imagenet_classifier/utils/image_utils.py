@@ -1,10 +1,91 @@
+import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
 from tensorflow.keras.applications.resnet50 import preprocess_input
 from tensorflow.keras.preprocessing import image
 
-def load_and_preprocess_image(img_path, target_size=(224, 224)):
+def load_and_preprocess_image(img_path, target_size=(224, 224), preprocess=preprocess_input, cache=None):
+    if cache is not None:
+        x = np.empty((1,) + tuple(target_size) + (3,), dtype=np.float32)
+        _decode_into(img_path, x[0], target_size, cache)
+        return preprocess(x)
     img = image.load_img(img_path, target_size=target_size)
     x = image.img_to_array(img)  # Convert to array
     x = np.expand_dims(x, axis=0)  # Add batch dimension
-    x = preprocess_input(x)  # Preprocess for ResNet50
+    x = preprocess(x)  # Preprocess for ResNet50 unless another model's function is given
     return x
+
+def _decode_into(img_path, out, target_size, cache=None):
+    # Same conversions as load_img (RGB, nearest-neighbour resize), but the
+    # pixels are cast straight into their slot of the batch buffer
+    if cache is not None:
+        cached = cache.get(img_path)
+        if cached is not None:
+            out[...] = cached
+            return
+        stat = os.stat(img_path)  # Taken before decoding, so a concurrent edit reads as stale next time
+    with Image.open(img_path) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        width_height = (target_size[1], target_size[0])
+        if img.size != width_height:
+            img = img.resize(width_height, Image.NEAREST)
+        pixels = np.asarray(img)
+    out[...] = pixels
+    if cache is not None:
+        cache.put(img_path, pixels, stat)
+
+def load_and_preprocess_images(img_paths, target_size=(224, 224), executor=None, workers=None, out=None,
+                               preprocess=preprocess_input, cache=None):
+    """
+    Load a batch of images into one preallocated float32 buffer.
+
+    Each image is decoded on a thread pool directly into its row of an
+    (N, H, W, 3) buffer, and preprocess_input runs once over the whole batch
+    in place. The result can go straight to model.predict.
+
+    Args:
+        img_paths (list): Image paths
+        target_size (tuple): (height, width) to resize to
+        executor (ThreadPoolExecutor): Pool to decode on; a temporary one with
+            `workers` threads is used if not given
+        workers (int): Threads for the temporary pool (default: CPU count)
+        out (numpy.ndarray): Optional float32 buffer of shape
+            (>= N, H, W, 3) to reuse across calls
+        preprocess (callable): The model's preprocess_input (default: ResNet50)
+        cache (TensorCache): Optional on-disk cache of decoded pixels for
+            target_size; hits skip decoding entirely
+
+    Returns:
+        tuple: (x, failed) - x holds the successfully loaded images in input
+        order, failed is a list of (path, error message) for the rest
+    """
+    n = len(img_paths)
+    if cache is not None and cache.target_size != tuple(target_size):
+        raise ValueError(f"Cache holds {cache.target_size} images, not {tuple(target_size)}")
+    if out is None:
+        out = np.empty((n,) + tuple(target_size) + (3,), dtype=np.float32)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_decode_into, path, out[i], target_size, cache) for i, path in enumerate(img_paths)]
+        ok, failed = [], []
+        for i, (path, future) in enumerate(zip(img_paths, futures)):
+            try:
+                future.result()
+                ok.append(i)
+            except Exception as e:
+                failed.append((path, f"{type(e).__name__}: {e}"))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    # Close gaps left by failed images so the batch stays one contiguous block
+    for dest, src in enumerate(ok):
+        if dest != src:
+            out[dest] = out[src]
+    x = preprocess(out[:len(ok)])  # In place on the buffer; no per-image copies
+    return x, failed
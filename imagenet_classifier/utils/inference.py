@@ -0,0 +1,35 @@
+import numpy as np
+import tensorflow as tf
+
+
+def compile_inference(model, input_shape=(224, 224, 3), jit_compile=False):
+    """
+    Wrap a Keras model in a tf.function with a fixed input signature.
+
+    The batch dimension is left open, so one trace serves every batch size.
+
+    Args:
+        model (tf.keras.Model): Model to wrap
+        input_shape (tuple): Per-image input shape
+        jit_compile (bool): Also compile the graph with XLA
+
+    Returns:
+        callable: Maps a float32 (N, *input_shape) array to an (N, classes) array
+    """
+    signature = [tf.TensorSpec(shape=(None,) + tuple(input_shape), dtype=tf.float32)]
+
+    @tf.function(input_signature=signature, jit_compile=jit_compile)
+    def serve(x):
+        return model(x, training=False)
+
+    def infer(x):
+        return serve(tf.convert_to_tensor(x, dtype=tf.float32)).numpy()
+
+    infer.concrete_function = serve.get_concrete_function()
+    return infer
+
+
+def warm_up(infer, input_shape=(224, 224, 3), batch_sizes=(1,)):
+    """Run dummy batches so tracing and kernel setup happen before real requests."""
+    for batch_size in batch_sizes:
+        infer(np.zeros((batch_size,) + tuple(input_shape), dtype=np.float32))
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from utils.batch_classify import IMAGE_EXTENSIONS
+
+QUANTIZATIONS = ('none', 'dynamic', 'float16', 'int8')
+
+
+def convert_to_tflite(model, tflite_path, quantization='dynamic', representative_data=None):
+    """
+    Convert a Keras model to a (quantized) TFLite file.
+
+    Args:
+        model (tf.keras.Model): Float model to convert
+        tflite_path (str): Output file
+        quantization (str): 'none' (float32), 'dynamic' (int8 weights),
+            'float16' (float16 weights) or 'int8' (int8 weights and activations,
+            float32 input/output)
+        representative_data (numpy.ndarray): Preprocessed images used to
+            calibrate 'int8'
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if representative_data is None or len(representative_data) == 0:
+            raise ValueError("int8 quantization needs representative images for calibration")
+        converter.representative_dataset = lambda: ([x[np.newaxis]] for x in representative_data)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    tflite_model = converter.convert()
+    # Write beside the target and rename, so a failed or concurrent run never
+    # leaves a truncated file in the cache that later loads would trust
+    os.makedirs(os.path.dirname(os.path.abspath(tflite_path)), exist_ok=True)
+    tmp_path = f'{tflite_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(tflite_model)
+    os.replace(tmp_path, tflite_path)
+
+
+class TFLiteModel:
+    """Runs a .tflite file through the TFLite interpreter; call it like model.predict."""
+
+    def __init__(self, tflite_path, num_threads=None):
+        self.path = tflite_path
+        self.interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._input_shape = None
+
+    def __call__(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if x.shape != self._input_shape:
+            self.interpreter.resize_tensor_input(self.input_index, x.shape)
+            self.interpreter.allocate_tensors()
+            self._input_shape = x.shape
+        self.interpreter.set_tensor(self.input_index, x)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+
+def list_images(image_dir):
+    names = sorted(n for n in os.listdir(image_dir) if os.path.splitext(n)[1].lower() in IMAGE_EXTENSIONS)
+    return [os.path.join(image_dir, n) for n in names]
+
+
+def load_calibration_data(image_dir, preprocess, limit=200, paths=None):
+    """Preprocessed images from image_dir (or the given paths) for int8 calibration."""
+    if paths is None:
+        paths = list_images(image_dir)[:limit]
+    if not paths:
+        raise ValueError(f"No images found in {image_dir}")
+    return np.concatenate([preprocess(p) for p in paths])
+
+
+def tflite_path_for(model_name, quantization, cache_dir='model_cache', calibration_data=None):
+    """Cached .tflite file; int8 files are also keyed by a hash of their calibration data."""
+    suffix = quantization
+    if quantization == 'int8' and calibration_data is not None:
+        digest = hashlib.sha256(np.ascontiguousarray(calibration_data, dtype=np.float32).view(np.uint8))
+        suffix += '_' + digest.hexdigest()[:12]
+    return os.path.join(cache_dir, f"{model_name}_{suffix}.tflite")
+
+
+def load_tflite_model(model, model_name, quantization, calibration_data=None, cache_dir='model_cache',
+                      num_threads=None):
+    """Convert `model` once (cached under cache_dir) and return a TFLiteModel for it."""
+    path = tflite_path_for(model_name, quantization, cache_dir, calibration_data)
+    if not os.path.exists(path):
+        convert_to_tflite(model, path, quantization, calibration_data)
+    return TFLiteModel(path, num_threads)
+
+
+def quantization_report(model, model_name, image_dir, preprocess, modes=QUANTIZATIONS, cache_dir='model_cache',
+                        calibration_dir=None, hold_out_every=4):
+    """
+    Compare quantized TFLite conversions with the float Keras model on local images.
+
+    int8 is never scored on the images it was calibrated on: those come from
+    calibration_dir when it is a different directory, otherwise every
+    hold_out_every-th image of image_dir is set aside for calibration.
+
+    Args:
+        model (tf.keras.Model): Float reference model
+        model_name (str): Used to name the cached .tflite files
+        image_dir (str): Directory of evaluation images
+        preprocess (callable): Image path -> preprocessed (1, H, W, 3) array
+        calibration_dir (str): Separate images used to calibrate int8
+
+    Returns:
+        list: One dict per model with top-1/top-5 agreement, p50 latency and size
+    """
+    paths = list_images(image_dir)
+    calibration_paths = []
+    if 'int8' in modes:
+        if calibration_dir and os.path.realpath(calibration_dir) != os.path.realpath(image_dir):
+            calibration_paths = list_images(calibration_dir)[:200]
+        else:
+            calibration_paths = paths[::hold_out_every][:200]
+        held_out = {os.path.realpath(p) for p in calibration_paths}
+        paths = [p for p in paths if os.path.realpath(p) not in held_out]
+    images = load_calibration_data(image_dir, preprocess, paths=paths)
+    calibration = None
+    if calibration_paths:
+        calibration = load_calibration_data(calibration_dir, preprocess, paths=calibration_paths)
+
+    def run(infer):
+        infer(images[:1])  # Warm-up
+        preds, latencies = [], []
+        for x in images:
+            start = time.perf_counter()
+            preds.append(infer(x[np.newaxis])[0])
+            latencies.append((time.perf_counter() - start) * 1000)
+        return np.stack(preds), float(np.percentile(latencies, 50))
+
+    ref_preds, ref_p50 = run(lambda x: model(x, training=False).numpy())
+    ref_top1 = ref_preds.argmax(axis=1)
+    results = [{'mode': 'float (keras)', 'top1_agreement': 1.0, 'top5_agreement': 1.0, 'p50_ms': ref_p50,
+                'size_mb': model.count_params() * 4 / (1024 * 1024)}]
+
+    for mode in modes:
+        tflite_model = load_tflite_model(model, model_name, mode, calibration, cache_dir)
+        preds, p50 = run(tflite_model)
+        top5 = np.argsort(preds, axis=1)[:, -5:]
+        results.append({
+            'mode': f"tflite {mode}",
+            'top1_agreement': float((preds.argmax(axis=1) == ref_top1).mean()),
+            'top5_agreement': float((top5 == ref_top1[:, np.newaxis]).any(axis=1).mean()),
+            'p50_ms': p50,
+            'size_mb': os.path.getsize(tflite_model.path) / (1024 * 1024),
+        })
+    return results
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+CHUNK_ROWS = 256
+
+
+class TensorCache:
+    """
+    On-disk cache of decoded, resized images, read back through memory maps.
+
+    Pixels are kept as uint8 (H, W, 3) rows in fixed-size .npy chunk files under
+    cache_dir/<H>x<W>/, so a hit is a view into the page cache instead of a JPEG
+    decode. Rows are stored before preprocess_input, which makes one cache serve
+    every model with the same input size. An entry is keyed by absolute path and
+    only used while the file's size and mtime still match; a changed file is
+    re-decoded into the same row.
+
+    Args:
+        cache_dir (str): Root directory of the cache
+        target_size (tuple): (height, width) the rows are resized to
+    """
+
+    def __init__(self, cache_dir, target_size=(224, 224)):
+        self.target_size = tuple(target_size)
+        self.root = os.path.join(cache_dir, f'{target_size[0]}x{target_size[1]}')
+        os.makedirs(self.root, exist_ok=True)
+        self._index_path = os.path.join(self.root, 'index.json')
+        self._index = {}  # abspath -> [size, mtime_ns, row]
+        self._chunks = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self._load_index()
+        self._next_row = max((entry[2] for entry in self._index.values()), default=-1) + 1
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        # Drop entries whose chunk file has gone missing
+        self._index = {path: entry for path, entry in index.items()
+                       if os.path.exists(self._chunk_path(entry[2] // CHUNK_ROWS))}
+
+    def _chunk_path(self, chunk):
+        return os.path.join(self.root, f'pixels-{chunk:05d}.npy')
+
+    def _chunk(self, chunk):
+        array = self._chunks.get(chunk)
+        if array is None:
+            path = self._chunk_path(chunk)
+            if os.path.exists(path):
+                array = np.load(path, mmap_mode='r+')
+            else:
+                shape = (CHUNK_ROWS,) + self.target_size + (3,)
+                array = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=shape)
+            self._chunks[chunk] = array
+        return array
+
+    def _row(self, row):
+        return self._chunk(row // CHUNK_ROWS)[row % CHUNK_ROWS]
+
+    def get(self, img_path):
+        """Cached uint8 pixels for img_path, or None if missing or stale."""
+        path = os.path.abspath(img_path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                self.hits += 1
+                return self._row(entry[2])
+            self.misses += 1
+        return None
+
+    def put(self, img_path, pixels, stat=None):
+        """Store freshly decoded (H, W, 3) pixels for img_path."""
+        path = os.path.abspath(img_path)
+        stat = stat or os.stat(path)
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is not None:
+                row = entry[2]  # Source changed; overwrite its old row
+            else:
+                row = self._next_row
+                self._next_row += 1
+            self._row(row)[...] = pixels
+            self._index[path] = [stat.st_size, stat.st_mtime_ns, row]
+
+    def flush(self):
+        """Write dirty pages and the index; entries are only visible to later runs after this."""
+        with self._lock:
+            for array in self._chunks.values():
+                array.flush()
+            tmp_path = self._index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self._index_path)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._index), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,130 @@
+import numpy as np
+
+THUMBNAIL_SIZE = (32, 32)
+
+
+def _thumbnail(cv2, frame):
+    # Small grayscale copy used to compare frames cheaply
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+
+class VideoSampler:
+    """
+    Iterates over the frames of a video worth classifying, decoded in memory.
+
+    Candidate frames are taken every `every_seconds`; frames in between are only
+    grabbed, never converted. A candidate is kept when it differs from the last
+    kept frame by at least `min_change` (mean absolute difference of 32x32
+    grayscale thumbnails, 0..1), so static stretches produce a single frame.
+    A high min_change (e.g. 0.15) turns this into scene-change sampling.
+
+    Args:
+        video_path (str): Any file OpenCV can open
+        target_size (tuple): (height, width) frames are resized to
+        every_seconds (float): Spacing of candidate frames
+        min_change (float): Minimum difference from the last kept frame
+
+    Yields:
+        tuple: (timestamp_seconds, (H, W, 3) uint8 RGB frame)
+    """
+
+    def __init__(self, video_path, target_size=(224, 224), every_seconds=1.0, min_change=0.02):
+        self.video_path = video_path
+        self.target_size = tuple(target_size)
+        self.every_seconds = every_seconds
+        self.min_change = min_change
+        self.duration = 0.0  # Known once iteration has finished
+        self.candidates = self.skipped = 0
+
+    def __iter__(self):
+        import cv2  # Only needed for video; see requirements.txt
+
+        capture = cv2.VideoCapture(self.video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video: {self.video_path}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        step = max(1, round(self.every_seconds * fps))
+        width_height = (self.target_size[1], self.target_size[0])
+        previous = None
+        index = 0
+        try:
+            while capture.grab():
+                timestamp = index / fps
+                self.duration = timestamp + 1 / fps
+                index += 1
+                if (index - 1) % step:
+                    continue
+                ok, frame = capture.retrieve()
+                if not ok:
+                    continue
+                self.candidates += 1
+                thumbnail = _thumbnail(cv2, frame)
+                if previous is not None and np.abs(thumbnail - previous).mean() < self.min_change:
+                    self.skipped += 1
+                    continue
+                previous = thumbnail
+                frame = cv2.resize(frame, width_height, interpolation=cv2.INTER_AREA)
+                yield timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        finally:
+            capture.release()
+
+
+def _segment_result(segment, decoder, top_k, min_prob):
+    top = decoder.top_k(segment['sum'][np.newaxis] / segment['frames'], top_k, min_prob)
+    labels, probs, mask = top.labels[0].tolist(), top.probabilities[0].tolist(), top.mask[0].tolist()
+    return {
+        'start': segment['start'],
+        'end': segment['end'],
+        'frames': segment['frames'],
+        'predictions': [{'label': label, 'probability': prob} for label, prob, keep in zip(labels, probs, mask) if keep],
+    }
+
+
+def classify_video(infer, decoder, sampler, preprocess, batch_size=32, top_k=3, min_prob=None):
+    """
+    Classify sampled frames in batches and stream labelled segments.
+
+    Consecutive kept frames with the same top-1 class form one segment; its
+    predictions are the mean of its frames' probabilities. A segment is yielded
+    as soon as the next one starts, so results arrive while the video is still
+    being read.
+
+    Args:
+        infer (callable): Maps a preprocessed batch to (N, 1000) probabilities
+        decoder (ImageNetDecoder): Turns probabilities into labels
+        sampler (VideoSampler): Source of frames
+        preprocess (callable): The model's preprocess_input
+
+    Yields:
+        dict: start, end (seconds), frames and predictions of each segment
+    """
+    batch = np.empty((batch_size,) + sampler.target_size + (3,), dtype=np.float32)
+    timestamps = []
+    segment = None
+
+    def run_batch():
+        nonlocal segment
+        preds = infer(preprocess(batch[:len(timestamps)]))
+        for timestamp, row, label in zip(timestamps, preds, preds.argmax(axis=1)):
+            if segment is not None and segment['class'] == label:
+                segment['frames'] += 1
+                segment['sum'] += row
+                continue
+            if segment is not None:
+                segment['end'] = timestamp
+                yield _segment_result(segment, decoder, top_k, min_prob)
+            segment = {'class': label, 'start': timestamp, 'end': timestamp, 'frames': 1,
+                       'sum': row.astype(np.float64)}
+        timestamps.clear()
+
+    for timestamp, frame in sampler:
+        batch[len(timestamps)] = frame
+        timestamps.append(timestamp)
+        if len(timestamps) == batch_size:
+            yield from run_batch()
+    if timestamps:
+        yield from run_batch()
+    if segment is not None:
+        segment['end'] = sampler.duration
+        yield _segment_result(segment, decoder, top_k, min_prob)